@@ -1,16 +1,9 @@
-from fastapi import FastAPI
-from prometheus_client import make_asgi_app
-
-app = FastAPI()
-
-# Create metrics endpoint for Prometheus
-metrics_app = make_asgi_app()
-app.mount("/metrics", metrics_app)
-
-@app.get("/health")
-async def health_check():
-    return {"status": "healthy"}
+from src.server import app
 
 @app.get("/")
 async def root():
-    return {"message": "Welcome to Glean MCP Server"} 
\ No newline at end of file
+    return {"message": "Welcome to Glean MCP Server"}
+
+if __name__ == "__main__":
+    from src.server import run
+    run(app)
@@ -0,0 +1,87 @@
+"""Benchmark of the upstream Glean client against a local stub.
+
+Measures:
+- pooled: one shared ``GleanClient`` reusing keep-alive connections
+- unpooled: a fresh connection per call, as ``src/common/client.ts`` does
+- coalesced: concurrent identical searches, counting upstream calls
+- retried: the success rate with every Nth upstream call answering 429
+
+Usage:
+    python benchmarks/bench_glean_client.py [--requests N] [--concurrency N] [--latency SECONDS]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from benchmarks.stub_glean import StubGlean, serve
+from src.glean_client import GleanClient
+
+async def timed(label: str, requests: int, calls):
+    start = time.perf_counter()
+    await calls()
+    elapsed = time.perf_counter() - start
+    print(f"{label:>10}: {requests / elapsed:10.0f} req/s  {elapsed / requests * 1e3:8.2f} ms/request")
+
+async def run(requests: int, concurrency: int, latency: float):
+    stub = StubGlean(latency=latency)
+    async with serve(stub) as base_url:
+        limit = asyncio.Semaphore(concurrency)
+
+        async def fan_out(call):
+            async def one(i):
+                async with limit:
+                    await call(i)
+            await asyncio.gather(*(one(i) for i in range(requests)))
+
+        pooled = GleanClient(None, "token", base_url=base_url, max_connections=concurrency)
+        await pooled.search({"query": "warmup"})
+        await timed("pooled", requests, lambda: fan_out(
+            lambda i: pooled.search({"query": f"q{i}"})
+        ))
+
+        async def unpooled_call(i):
+            client = GleanClient(None, "token", base_url=base_url)
+            try:
+                await client.search({"query": f"q{i}"})
+            finally:
+                await client.close()
+
+        await timed("unpooled", requests, lambda: fan_out(unpooled_call))
+
+        stub.calls.clear()
+        await timed("coalesced", requests, lambda: asyncio.gather(*(
+            pooled.search({"pageSize": 10, "query": "same"}) for _ in range(requests)
+        )))
+        print(f"{'':>10}  {requests} searches -> {stub.calls['search']} upstream calls")
+        await pooled.close()
+
+        stub.fail_every = 5
+        retrying = GleanClient(None, "token", base_url=base_url, max_connections=concurrency, backoff=0.001)
+        failures = 0
+
+        async def retried_call(i):
+            nonlocal failures
+            try:
+                await retrying.search({"query": f"r{i}"})
+            except Exception:
+                failures += 1
+
+        await fan_out(retried_call)
+        print(f"{'retried':>10}: {requests - failures}/{requests} succeeded with every 5th call throttled")
+        await retrying.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.005)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.concurrency, args.latency))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Micro-benchmark of the /v1/mcp JSON-RPC ingress path.
+
+Compares the previous pipeline (``BaseHTTPMiddleware`` that decodes the body
+to sniff for ``initialize``, a second decode in the endpoint, per-request
+``MCPMessage(**message)`` construction and ``response.dict()`` +
+``JSONResponse``) against the current one in ``src/server.py``.
+
+Requests are driven straight through the ASGI callables, so the numbers
+cover middleware, routing, parsing, validation and serialization but not
+the network or the HTTP server.
+
+Usage:
+    python benchmarks/bench_ingress.py [--requests N] [--rounds N]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fastapi import FastAPI, Header, Request
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from src import server
+
+MESSAGE = {
+    "jsonrpc": "2.0",
+    "id": "42",
+    "method": "tools/call",
+    "params": {
+        "name": "search",
+        "arguments": {"query": "quarterly planning", "pageSize": 10},
+    },
+}
+
+class LegacyMCPMessage(BaseModel):
+    jsonrpc: str = "2.0"
+    id: Optional[str] = None
+    method: str
+    params: Optional[Dict[str, Any]] = None
+
+class LegacyMCPResponse(BaseModel):
+    jsonrpc: str = "2.0"
+    id: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[Dict[str, Any]] = None
+
+def build_legacy_app() -> FastAPI:
+    """The ingress path as it was before the single-parse rewrite"""
+    legacy = FastAPI()
+
+    @legacy.middleware("http")
+    async def session_middleware(request: Request, call_next):
+        session_id = request.headers.get("Mcp-Session-Id")
+        if request.url.path == "/v1/mcp" and request.method == "POST":
+            message = await request.json()
+            if isinstance(message, dict) and message.get("method") == "initialize":
+                pass
+        if session_id and not server.session_manager.validate_session(session_id):
+            return JSONResponse(status_code=404, content={"error": "Session not found"})
+        return await call_next(request)
+
+    @legacy.post("/v1/mcp")
+    async def mcp_endpoint(request: Request, accept: str = Header(...)):
+        message = await request.json()
+        mcp_message = LegacyMCPMessage(**message)
+        response = LegacyMCPResponse(
+            id=mcp_message.id,
+            error={"code": -32601, "message": "Method not found"},
+        )
+        return JSONResponse(content=response.dict())
+
+    return legacy
+
+async def drive(app, body: bytes, count: int) -> float:
+    """Send ``count`` POSTs through ``app`` and return the elapsed seconds"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/v1/mcp",
+        "raw_path": b"/v1/mcp",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (b"host", b"bench"),
+            (b"accept", b"application/json"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+
+    request_message = {"type": "http.request", "body": body, "more_body": False}
+    never = asyncio.Event()
+
+    def make_receive():
+        pending = [request_message]
+
+        async def receive():
+            if pending:
+                return pending.pop()
+            # Nothing else arrives; the client never disconnects
+            await never.wait()
+
+        return receive
+
+    async def send(message):
+        if message["type"] == "http.response.start" and message["status"] != 200:
+            raise RuntimeError(f"unexpected status {message['status']}")
+
+    start = time.perf_counter()
+    for _ in range(count):
+        await app(dict(scope), make_receive(), send)
+    return time.perf_counter() - start
+
+async def run(requests: int, rounds: int):
+    body = json.dumps(MESSAGE).encode()
+    apps = {"legacy": build_legacy_app(), "current": server.app}
+
+    # Warm up routing tables, validators and middleware stacks
+    for app in apps.values():
+        await drive(app, body, 200)
+
+    best = {}
+    for name, app in apps.items():
+        best[name] = min([await drive(app, body, requests) for _ in range(rounds)])
+
+    for name, elapsed in best.items():
+        per_request = elapsed / requests * 1e6
+        print(f"{name:>8}: {per_request:8.1f} us/request  {requests / elapsed:10.0f} req/s")
+    print(f" speedup: {best['legacy'] / best['current']:.2f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.rounds))
+
+if __name__ == "__main__":
+    main()
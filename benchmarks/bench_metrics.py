@@ -0,0 +1,119 @@
+"""Overhead of the Prometheus instrumentation on the /v1/mcp hot path.
+
+Three measurements, each with ``metrics.enabled`` on and off:
+- recording: the absolute cost of the recording calls one request makes
+  (four stage observations and one request observation), timed in isolation
+- tools/list: the same in-process request through the app's ASGI stack,
+  alternating rounds to even out noise and reporting the best of each
+- glean_search: searches against the local stub with upstream latency and
+  the search cache off, reporting throughput and CPU time per request
+
+Wall-clock results vary by several percent between runs on a shared
+machine, more than the instrumentation costs; the recording cost, set
+against the CPU time of a search, is the figure to compare. The stub runs
+in-process, so that CPU time includes its side of each call.
+
+Usage:
+    python benchmarks/bench_metrics.py [--requests N] [--rounds N]
+        [--searches N] [--concurrency N] [--latency SECONDS]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from benchmarks.bench_ingress import drive
+from benchmarks.stub_glean import StubGlean, serve
+from src import metrics, server
+
+MESSAGE = {"jsonrpc": "2.0", "id": "1", "method": "tools/list"}
+
+def search_message(i: int) -> dict:
+    arguments = {"query": f"query {i}", "pageSize": 10}
+    return {"jsonrpc": "2.0", "id": str(i), "method": "tools/call",
+            "params": {"name": "glean_search", "arguments": arguments}}
+
+def record_one_request():
+    """The recording calls made while handling one single-message POST"""
+    for stage in ("parse", "validate", "dispatch", "serialize"):
+        metrics.observe_stage(stage, time.perf_counter())
+    metrics.observe_request("tools/list", time.perf_counter())
+
+def bench_recording(count: int) -> float:
+    """Print the recording cost and return the added microseconds per request"""
+    per_request = {}
+    for enabled in (False, True):
+        metrics.enabled = enabled
+        elapsed = min(timeit.repeat(record_one_request, number=count, repeat=5))
+        per_request[enabled] = elapsed / count * 1e6
+        label = "on" if enabled else "off"
+        print(f"recording {label:>3}: {per_request[enabled]:8.2f} us/request")
+    return per_request[True] - per_request[False]
+
+async def bench_tools_list(requests: int, rounds: int):
+    body = json.dumps(MESSAGE).encode()
+    await drive(server.app, body, 500)
+
+    best = {True: float("inf"), False: float("inf")}
+    for _ in range(rounds):
+        for enabled in (False, True):
+            metrics.enabled = enabled
+            best[enabled] = min(best[enabled], await drive(server.app, body, requests))
+
+    for enabled, label in ((False, "off"), (True, "on")):
+        elapsed = best[enabled]
+        print(f"tools/list {label:>3}: {elapsed / requests * 1e6:8.1f} us/request  {requests / elapsed:10.0f} req/s")
+    print(f"  overhead: {(best[True] / best[False] - 1) * 100:+.1f}%")
+
+async def bench_search(searches: int, concurrency: int, latency: float, recording: float):
+    server.config.search_cache_enabled = False
+    async with serve(StubGlean(latency=latency)) as base_url:
+        os.environ["GLEAN_BASE_URL"] = base_url
+        os.environ.setdefault("GLEAN_API_TOKEN", "bench")
+        await server.reset_client()
+
+        per_worker = searches // concurrency
+
+        async def run_all(offset: int):
+            await asyncio.gather(*(
+                drive(server.app, json.dumps(search_message(offset + w)).encode(), per_worker)
+                for w in range(concurrency)
+            ))
+
+        await run_all(0)
+        total = per_worker * concurrency
+        results = {}
+        for enabled in (False, True):
+            metrics.enabled = enabled
+            wall, cpu = time.perf_counter(), time.process_time()
+            await run_all(concurrency)
+            results[enabled] = (time.perf_counter() - wall, time.process_time() - cpu)
+        await server.reset_client()
+
+    for enabled, label in ((False, "off"), (True, "on")):
+        wall, cpu = results[enabled]
+        print(f"glean_search {label:>3}: {total / wall:8.0f} req/s  {cpu / total * 1e6:8.1f} us CPU/request")
+    cpu = sum(cpu for _, cpu in results.values()) / (2 * total) * 1e6
+    print(f"  recording: {recording:.2f} us of {cpu:.0f} us CPU/request ({recording / cpu * 100:.3f}%)"
+          f" with {latency * 1e3:.0f} ms upstream latency")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--searches", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.005)
+    args = parser.parse_args()
+    recording = bench_recording(args.requests * 10)
+    asyncio.run(bench_tools_list(args.requests, args.rounds))
+    asyncio.run(bench_search(args.searches, args.concurrency, args.latency, recording))
+
+if __name__ == "__main__":
+    main()
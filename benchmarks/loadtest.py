@@ -0,0 +1,463 @@
+"""Load test of the MCP server over HTTP POST, SSE and WebSocket.
+
+Starts the stub Glean upstream and the server (``python -m app.main``, as
+deployed) as subprocesses, then replays a JSON-RPC workload against each
+transport at a fixed concurrency spread over a number of sessions:
+- http: every message as a POST answered with JSON
+- sse: the streamed calls (glean_chat) as POSTs answered with SSE
+- resume: the streamed calls, each dropped after its first event and
+  finished with a ``GET /v1/mcp`` carrying ``Last-Event-ID``
+- ws: every message pipelined over one WebSocket per session, each opened
+  with that session's ``Mcp-Session-Id``
+
+For every transport it reports throughput, p50/p95/p99 latency, errors and
+the server's RSS growth, and writes everything to a JSON result file so
+runs can be compared between releases.
+
+The workload is a JSONL file with one JSON-RPC message (or batch) per line;
+``--generate`` writes a seeded, reproducible one. Request ids are rewritten
+so every request in a run is unique.
+
+Usage:
+    python benchmarks/loadtest.py --generate workload.jsonl --messages 500
+    python benchmarks/loadtest.py --workload workload.jsonl \\
+        [--transports http,sse,resume,ws] [--requests N] [--concurrency N] [--sessions N] [--output FILE]
+"""
+
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import websockets
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+TRANSPORTS = ("http", "sse", "resume", "ws")
+
+# Transports that only replay the workload's streamed calls
+STREAMING_TRANSPORTS = ("sse", "resume")
+
+QUERIES = [
+    "quarterly planning", "onboarding checklist", "vacation policy", "incident runbook",
+    "expense report", "design review", "holiday calendar", "security training",
+]
+
+def generate_workload(count: int, seed: int) -> List[Dict[str, Any]]:
+    """Seeded mix of searches (with repeats), chats, tools/list and pings"""
+    rng = random.Random(seed)
+    messages = []
+    for i in range(count):
+        roll = rng.random()
+        if roll < 0.6:
+            arguments = {"query": rng.choice(QUERIES), "pageSize": rng.choice([5, 10, 20])}
+            message = {"method": "tools/call", "params": {"name": "glean_search", "arguments": arguments}}
+        elif roll < 0.8:
+            text = f"What do we know about {rng.choice(QUERIES)}?"
+            arguments = {"messages": [{"author": "USER", "messageType": "CONTENT", "fragments": [{"text": text}]}]}
+            # The progress token asks for the answer to be streamed back
+            params = {"name": "glean_chat", "arguments": arguments, "_meta": {"progressToken": f"chat-{i}"}}
+            message = {"method": "tools/call", "params": params}
+        elif roll < 0.9:
+            message = {"method": "tools/list"}
+        else:
+            message = {"method": "ping"}
+        messages.append({"jsonrpc": "2.0", "id": str(i), **message})
+    return messages
+
+def load_workload(path: str) -> List[Any]:
+    with open(path) as workload:
+        return [json.loads(line) for line in workload if line.strip()]
+
+def is_streamed(message: Any) -> bool:
+    """Whether the server answers ``message`` with SSE when the client accepts it"""
+    if not isinstance(message, dict) or message.get("method") != "tools/call":
+        return False
+    params = message.get("params")
+    return isinstance(params, dict) and params.get("name") == "glean_chat"
+
+def with_id(message: Any, request_id: str) -> Any:
+    """Copy of ``message`` with fresh ids; batch elements get suffixed ids"""
+    if isinstance(message, list):
+        return [with_id(element, f"{request_id}.{i}") for i, element in enumerate(message)]
+    if isinstance(message, dict) and "id" in message:
+        return {**message, "id": request_id}
+    return message
+
+def percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def rss_bytes(pid: int) -> Optional[int]:
+    """Resident set size of ``pid`` from /proc, or None where unavailable"""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+async def wait_until_up(url: str, process: subprocess.Popen, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"{url} exited with status {process.returncode}")
+            with contextlib.suppress(httpx.TransportError):
+                await client.get(url)
+                return
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+@contextlib.asynccontextmanager
+async def running_services(args):
+    """Start the stub upstream and the server; yields the server's base URL and pid"""
+    stub_port, server_port = free_port(), free_port()
+    env = {
+        **os.environ,
+        "GLEAN_BASE_URL": f"http://127.0.0.1:{stub_port}/rest/api/v1/",
+        "GLEAN_API_TOKEN": "loadtest",
+        "MCP_SEARCH_CACHE_ENABLED": "true" if args.cache else "false",
+        "MCP_HOST": "127.0.0.1",
+        "MCP_PORT": str(server_port),
+        "MCP_LOG_LEVEL": "warning",
+    }
+    stub = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "benchmarks", "stub_glean.py"),
+         "--port", str(stub_port), "--latency", str(args.upstream_latency),
+         "--chunk-delay", str(args.chunk_delay)],
+        cwd=ROOT, env=env
+    )
+    server = subprocess.Popen([sys.executable, "-m", "app.main"], cwd=ROOT, env=env)
+    try:
+        await wait_until_up(f"http://127.0.0.1:{stub_port}/", stub)
+        await wait_until_up(f"http://127.0.0.1:{server_port}/health", server)
+        yield f"127.0.0.1:{server_port}", server.pid
+    finally:
+        for process in (server, stub):
+            process.terminate()
+        for process in (server, stub):
+            with contextlib.suppress(subprocess.TimeoutExpired):
+                process.wait(timeout=10)
+
+async def open_sessions(client: httpx.AsyncClient, count: int) -> List[str]:
+    sessions = []
+    for _ in range(count):
+        response = await client.post(
+            "/v1/mcp",
+            json={"jsonrpc": "2.0", "id": "init", "method": "initialize"},
+            headers={"Accept": "application/json"}
+        )
+        sessions.append(response.headers["Mcp-Session-Id"])
+    return sessions
+
+def is_error(response: Any) -> bool:
+    if isinstance(response, list):
+        return any(is_error(element) for element in response)
+    return not isinstance(response, dict) or response.get("error") is not None
+
+def sse_event(lines: List[str]) -> Tuple[Optional[str], Any]:
+    """Event id and decoded data of one SSE event's lines"""
+    event_id, data = None, None
+    for line in lines:
+        if line.startswith("id: "):
+            event_id = line[4:]
+        elif line.startswith("data: "):
+            data = json.loads(line[6:])
+    return event_id, data
+
+async def sse_events(response: httpx.Response) -> AsyncIterator[Tuple[Optional[str], Any]]:
+    """Events of an SSE response, skipping heartbeats"""
+    lines: List[str] = []
+    async for line in response.aiter_lines():
+        if line:
+            lines.append(line)
+            continue
+        event_id, data = sse_event(lines)
+        lines = []
+        if data is not None:
+            yield event_id, data
+
+def is_response(message: Any) -> bool:
+    """A JSON-RPC response, as opposed to a progress notification"""
+    return isinstance(message, dict) and "method" not in message
+
+async def run_http(base: str, messages: List[Any], args, streaming: bool) -> Dict[str, Any]:
+    """POST each message; with ``streaming`` chat calls come back as SSE"""
+    accept = "application/json, text/event-stream" if streaming else "application/json"
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=f"http://{base}", limits=limits, timeout=60) as client:
+        sessions = await open_sessions(client, args.sessions)
+
+        async def send(i: int, message: Any) -> bool:
+            headers = {"Accept": accept, "Mcp-Session-Id": sessions[i % len(sessions)]}
+            body = json.dumps(message).encode()
+            async with client.stream("POST", "/v1/mcp", content=body, headers=headers) as response:
+                if response.status_code == 202:
+                    return True
+                if response.headers.get("content-type", "").startswith("text/event-stream"):
+                    final = None
+                    async for _, data in sse_events(response):
+                        final = data
+                    return response.status_code == 200 and not is_error(final)
+                payload = json.loads(await response.aread())
+                return response.status_code == 200 and not is_error(payload)
+
+        return await drive(messages, args, send)
+
+async def run_resume(base: str, messages: List[Any], args) -> Dict[str, Any]:
+    """POST each streamed call, drop it after one event and resume it with GET"""
+    resumed = 0
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=f"http://{base}", limits=limits, timeout=60) as client:
+        sessions = await open_sessions(client, args.sessions)
+
+        async def send(i: int, message: Any) -> bool:
+            session_id = sessions[i % len(sessions)]
+            headers = {"Accept": "application/json, text/event-stream", "Mcp-Session-Id": session_id}
+            body = json.dumps(message).encode()
+            async with client.stream("POST", "/v1/mcp", content=body, headers=headers) as response:
+                if response.status_code != 200:
+                    return False
+                async for event_id, first in sse_events(response):
+                    break
+                else:
+                    return False
+            if is_response(first):
+                # Answered in one event; there is nothing left to resume
+                return not is_error(first)
+
+            nonlocal resumed
+            resumed += 1
+            headers = {"Accept": "text/event-stream", "Mcp-Session-Id": session_id, "Last-Event-ID": event_id}
+            async with client.stream("GET", "/v1/mcp", headers=headers) as response:
+                final = None
+                async for _, data in sse_events(response):
+                    final = data
+                return response.status_code == 200 and is_response(final) and not is_error(final)
+
+        result = await drive(messages, args, send)
+    result["resumed"] = resumed
+    return result
+
+def reply_key(message: Any) -> Optional[str]:
+    """Request id a message or batch belongs to, given ids from ``with_id``"""
+    if isinstance(message, list):
+        for element in message:
+            key = reply_key(element)
+            if key is not None:
+                return key.split(".")[0]
+        return None
+    request_id = message.get("id") if isinstance(message, dict) else None
+    return request_id if isinstance(request_id, str) else None
+
+async def run_ws(base: str, messages: List[Any], args) -> Dict[str, Any]:
+    """Pipeline messages over one WebSocket per session, matching replies by id"""
+    async with httpx.AsyncClient(base_url=f"http://{base}", timeout=60) as client:
+        sessions = await open_sessions(client, args.sessions)
+    # The handshake's session puts each connection under its session's cap
+    connections = [
+        await websockets.connect(
+            f"ws://{base}/v1/mcp/ws", max_size=None, compression="deflate",
+            extra_headers={"Mcp-Session-Id": session_id}
+        )
+        for session_id in sessions
+    ]
+    pending: Dict[str, asyncio.Future] = {}
+
+    async def read(connection):
+        with contextlib.suppress(websockets.ConnectionClosed):
+            async for frame in connection:
+                reply = json.loads(frame)
+                future = pending.pop(reply_key(reply), None)
+                if future is not None and not future.done():
+                    future.set_result(reply)
+
+    readers = [asyncio.create_task(read(connection)) for connection in connections]
+
+    async def send(i: int, message: Any) -> bool:
+        request_id = reply_key(message)
+        if request_id is None:
+            await connections[i % len(connections)].send(json.dumps(message))
+            return True
+        future = asyncio.get_running_loop().create_future()
+        pending[request_id] = future
+        await connections[i % len(connections)].send(json.dumps(message))
+        return not is_error(await asyncio.wait_for(future, 60))
+
+    try:
+        return await drive(messages, args, send)
+    finally:
+        for connection in connections:
+            await connection.close()
+        for reader in readers:
+            reader.cancel()
+
+async def drive(messages: List[Any], args, send) -> Dict[str, Any]:
+    """Replay ``messages`` round-robin through ``send`` at ``args.concurrency``"""
+    total = args.warmup + args.requests
+    counter = itertools.count()
+    latencies: List[float] = []
+    errors = 0
+    started = None
+
+    async def worker():
+        nonlocal errors, started
+        while True:
+            i = next(counter)
+            if i >= total:
+                return
+            if i == args.warmup:
+                started = time.perf_counter()
+            message = with_id(messages[i % len(messages)], f"r{i}")
+            request_started = time.perf_counter()
+            try:
+                ok = await send(i, message)
+            except Exception:
+                ok = False
+            if i >= args.warmup:
+                latencies.append(time.perf_counter() - request_started)
+                errors += not ok
+
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - (started or time.perf_counter())
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "elapsed_seconds": elapsed,
+        "throughput_rps": len(latencies) / elapsed if elapsed else None,
+        "latency_seconds": {
+            "p50": percentile(latencies, 0.50),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+            "max": latencies[-1] if latencies else None,
+        },
+    }
+
+def git_commit() -> Optional[str]:
+    with contextlib.suppress(OSError, subprocess.CalledProcessError):
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    return None
+
+async def run(args) -> Dict[str, Any]:
+    if args.workload:
+        messages = load_workload(args.workload)
+    else:
+        messages = generate_workload(args.messages, args.seed)
+
+    streamed = [message for message in messages if is_streamed(message)]
+    results = {}
+    for transport in args.transports:
+        if transport in STREAMING_TRANSPORTS and not streamed:
+            print(f"{transport:>6}: skipped, the workload has no streamed calls")
+            continue
+        # Fresh server per transport so RSS growth is attributable
+        async with running_services(args) as (base, pid):
+            rss_before = rss_bytes(pid)
+            if transport == "ws":
+                result = await run_ws(base, messages, args)
+            elif transport == "resume":
+                result = await run_resume(base, streamed, args)
+            else:
+                result = await run_http(base, streamed if transport == "sse" else messages, args,
+                                        streaming=transport == "sse")
+            rss_after = rss_bytes(pid)
+        result["rss_bytes"] = {
+            "before": rss_before,
+            "after": rss_after,
+            "growth": rss_after - rss_before if rss_before and rss_after else None,
+        }
+        results[transport] = result
+        print_result(transport, result)
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "workload": args.workload or f"generated:{args.messages}:seed={args.seed}",
+            "workload_messages": len(messages),
+            "workload_streamed": len(streamed),
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "sessions": args.sessions,
+            "upstream_latency": args.upstream_latency,
+            "chunk_delay": args.chunk_delay,
+            "cache": args.cache,
+        },
+        "results": results,
+    }
+
+def print_result(transport: str, result: Dict[str, Any]):
+    latency = result["latency_seconds"]
+
+    def ms(value: Optional[float]) -> str:
+        return f"{value * 1e3:8.2f}" if value is not None else "     n/a"
+
+    growth = result["rss_bytes"]["growth"]
+    rss = f"{growth / 1024 / 1024:+.1f} MiB" if growth is not None else "n/a"
+    print(
+        f"{transport:>6}: {result['throughput_rps'] or 0:9.0f} req/s"
+        f"  p50 {ms(latency['p50'])} ms  p95 {ms(latency['p95'])} ms  p99 {ms(latency['p99'])} ms"
+        f"  errors {result['errors']}  rss {rss}"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workload", help="JSONL file of JSON-RPC messages to replay")
+    parser.add_argument("--generate", metavar="FILE", help="write a generated workload to FILE and exit")
+    parser.add_argument("--messages", type=int, default=200, help="size of a generated workload")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--transports", default=",".join(TRANSPORTS))
+    parser.add_argument("--requests", type=int, default=2000, help="measured requests per transport")
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--upstream-latency", type=float, default=0.005)
+    parser.add_argument("--chunk-delay", type=float, default=0.0)
+    parser.add_argument("--no-cache", dest="cache", action="store_false", help="disable the search cache")
+    parser.add_argument("--output", default="loadtest_results.json")
+    args = parser.parse_args()
+
+    if args.generate:
+        with open(args.generate, "w") as workload:
+            for message in generate_workload(args.messages, args.seed):
+                workload.write(json.dumps(message) + "\n")
+        return
+
+    args.transports = [transport.strip() for transport in args.transports.split(",")]
+    unknown = set(args.transports) - set(TRANSPORTS)
+    if unknown:
+        parser.error(f"unknown transports: {', '.join(sorted(unknown))}")
+
+    report = asyncio.run(run(args))
+    with open(args.output, "w") as output:
+        json.dump(report, output, indent=2)
+    print(f"results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
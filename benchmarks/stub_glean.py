@@ -0,0 +1,172 @@
+"""Local stand-in for the Glean REST API.
+
+Serves ``/rest/api/v1/search``, ``/chat`` (including ``stream: true``) and
+``/summarize`` with canned payloads shaped like ``openapi.yaml``, with
+configurable latency and injected 429s. Point the server at it with
+``GLEAN_BASE_URL=http://127.0.0.1:<port>/rest/api/v1/``.
+
+Usage:
+    python benchmarks/stub_glean.py [--port N] [--latency SECONDS] [--fail-every N]
+"""
+
+from collections import Counter
+from typing import Any, Dict, List, Optional
+import argparse
+import asyncio
+import contextlib
+
+import uvicorn
+from pydantic_core import from_json, to_json
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+
+def search_response(query: str, page_size: int, text_size: int) -> Dict[str, Any]:
+    results = []
+    for i in range(page_size):
+        results.append({
+            "title": f"{query} result {i}",
+            "url": f"https://example.com/docs/{i}",
+            "document": {
+                "id": f"doc-{i}",
+                "datasource": "confluence",
+                "title": f"{query} result {i}",
+                "url": f"https://example.com/docs/{i}",
+            },
+            "snippets": [{"snippet": f"...{query}...", "text": f"About {query}"}],
+            "fullText": "lorem ipsum " * (text_size // 12),
+            "trackingToken": f"tt-{i}",
+        })
+    return {"results": results, "trackingToken": "search-tt", "hasMoreResults": False}
+
+def chat_chunks(text: str, chunk_size: int = 8) -> List[Dict[str, Any]]:
+    """Split an answer into streaming ChatResponse lines"""
+    chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+    lines = []
+    for i, chunk in enumerate(chunks):
+        lines.append({
+            "messages": [{
+                "author": "GLEAN_AI",
+                "messageType": "CONTENT",
+                "hasMoreFragments": i < len(chunks) - 1,
+                "fragments": [{"text": chunk}],
+            }],
+        })
+    return lines
+
+class StubGlean:
+    def __init__(
+        self,
+        latency: float = 0.0,
+        fail_every: int = 0,
+        chunk_delay: float = 0.0,
+        text_size: int = 256,
+        answer: str = "There are no holidays this year, sorry!"
+    ):
+        self.latency = latency
+        # Answer every Nth request with a 429 (0 disables)
+        self.fail_every = fail_every
+        # Pause between streamed chat lines
+        self.chunk_delay = chunk_delay
+        self.text_size = text_size
+        self.answer = answer
+        self.calls: Counter = Counter()
+        self.app = Starlette(routes=[
+            Route("/rest/api/v1/search", self.search, methods=["POST"]),
+            Route("/rest/api/v1/chat", self.chat, methods=["POST"]),
+            Route("/rest/api/v1/summarize", self.summarize, methods=["POST"]),
+        ])
+
+    async def begin(self, request: Request, endpoint: str) -> Optional[Response]:
+        """Count and delay the call; returns a 429 when one is due"""
+        self.calls[endpoint] += 1
+        # Taken before sleeping so concurrent calls each see their own ordinal
+        ordinal = sum(self.calls.values())
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.fail_every and ordinal % self.fail_every == 0:
+            return Response(status_code=429, headers={"Retry-After": "0"})
+        return None
+
+    async def search(self, request: Request) -> Response:
+        failure = await self.begin(request, "search")
+        if failure is not None:
+            return failure
+        body = from_json(await request.body())
+        payload = search_response(body.get("query", ""), int(body.get("pageSize", 10)), self.text_size)
+        return Response(to_json(payload), media_type="application/json")
+
+    async def chat(self, request: Request) -> Response:
+        failure = await self.begin(request, "chat")
+        if failure is not None:
+            return failure
+        body = from_json(await request.body())
+        lines = chat_chunks(self.answer)
+
+        if body.get("stream"):
+            async def stream():
+                for line in lines:
+                    if self.chunk_delay:
+                        await asyncio.sleep(self.chunk_delay)
+                    yield to_json(line) + b"\n"
+
+            return StreamingResponse(stream(), media_type="text/plain")
+
+        payload = {"messages": [{
+            "author": "GLEAN_AI",
+            "messageType": "CONTENT",
+            "hasMoreFragments": False,
+            "fragments": [{"text": self.answer}],
+        }]}
+        return Response(to_json(payload), media_type="text/plain")
+
+    async def summarize(self, request: Request) -> Response:
+        failure = await self.begin(request, "summarize")
+        if failure is not None:
+            return failure
+        payload = {"summary": {"text": "A short summary."}, "trackingToken": "summary-tt"}
+        return Response(to_json(payload), media_type="application/json")
+
+class EmbeddedServer(uvicorn.Server):
+    """uvicorn server that leaves SIGINT and SIGTERM to the host process"""
+
+    def install_signal_handlers(self):
+        pass
+
+@contextlib.asynccontextmanager
+async def serve_app(app, port: int = 0):
+    """Run ASGI ``app`` on 127.0.0.1 for the duration of the block; yields its host:port"""
+    server = EmbeddedServer(uvicorn.Config(
+        app, host="127.0.0.1", port=port, log_level="warning", lifespan="off"
+    ))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()
+        await asyncio.sleep(0.01)
+    bound_port = server.servers[0].sockets[0].getsockname()[1]
+    try:
+        yield f"127.0.0.1:{bound_port}"
+    finally:
+        server.should_exit = True
+        await task
+
+@contextlib.asynccontextmanager
+async def serve(stub: StubGlean, port: int = 0):
+    """Run ``stub`` on 127.0.0.1 for the duration of the block; yields its base URL"""
+    async with serve_app(stub.app, port) as address:
+        yield f"http://{address}/rest/api/v1/"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--fail-every", type=int, default=0)
+    parser.add_argument("--chunk-delay", type=float, default=0.0)
+    args = parser.parse_args()
+    stub = StubGlean(latency=args.latency, fail_every=args.fail_every, chunk_delay=args.chunk_delay)
+    uvicorn.run(stub.app, host="127.0.0.1", port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
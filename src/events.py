@@ -0,0 +1,253 @@
+"""Per-session event bus behind the SSE transport.
+
+Producers ``publish`` JSON-RPC messages for a session, either on the
+session's standalone stream or on a named stream such as the SSE response
+to one POST. Every open SSE stream receives the events of its stream
+through its own bounded queue, so an idle stream costs nothing until
+something happens. Event ids are unique within a session, and each session
+keeps a ring buffer of recent events so a client reconnecting with
+``Last-Event-ID`` resumes the stream that event belonged to where it left
+off. A single shared timer sends heartbeat comments to all streams and
+drops state for abandoned sessions.
+"""
+
+from collections import deque
+from enum import Enum
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set, Tuple
+import asyncio
+import contextlib
+import time
+
+from pydantic_core import to_json
+
+HEARTBEAT = b": ping\n\n"
+
+# Queued after the final event of a named stream
+END = b""
+
+class OverflowPolicy(str, Enum):
+    # End the stream; the client reconnects and replays from Last-Event-ID
+    DISCONNECT = "disconnect"
+    # Discard the oldest queued event to make room
+    DROP_OLDEST = "drop_oldest"
+    # Discard the event being published
+    DROP_NEWEST = "drop_newest"
+
+class Subscriber:
+    """One open SSE stream"""
+
+    __slots__ = ("queue", "stream", "closed")
+
+    def __init__(self, queue_size: int, stream: Optional[str]):
+        self.queue: "asyncio.Queue[bytes]" = asyncio.Queue(queue_size)
+        self.stream = stream
+        self.closed = False
+
+class Event:
+    """A published event kept for replay"""
+
+    __slots__ = ("id", "stream", "frame", "final")
+
+    def __init__(self, id: int, stream: Optional[str], frame: bytes, final: bool):
+        self.id = id
+        self.stream = stream
+        self.frame = frame
+        self.final = final
+
+class SessionEvents:
+    """Replay buffer and live subscribers for a single session"""
+
+    __slots__ = ("next_id", "buffer", "subscribers", "last_active")
+
+    def __init__(self, replay_size: int):
+        self.next_id = 1
+        self.buffer: Deque[Event] = deque(maxlen=replay_size)
+        self.subscribers: Set[Subscriber] = set()
+        self.last_active = time.monotonic()
+
+class EventBus:
+    def __init__(
+        self,
+        queue_size: int = 256,
+        replay_size: int = 256,
+        overflow_policy: OverflowPolicy = OverflowPolicy.DISCONNECT,
+        heartbeat_interval: float = 15,
+        retention: float = 300
+    ):
+        self.queue_size = queue_size
+        self.replay_size = replay_size
+        self.overflow_policy = overflow_policy
+        self.heartbeat_interval = heartbeat_interval
+        # How long a session without streams keeps its replay buffer
+        self.retention = retention
+        self.sessions: Dict[str, SessionEvents] = {}
+        self.stream_count = 0
+        self.heartbeat: Optional[asyncio.Task] = None
+
+    def session_events(self, session_id: str) -> SessionEvents:
+        events = self.sessions.get(session_id)
+        if events is None:
+            events = self.sessions[session_id] = SessionEvents(self.replay_size)
+        return events
+
+    def publish(
+        self,
+        session_id: str,
+        message: Any,
+        stream: Optional[str] = None,
+        final: bool = False
+    ) -> int:
+        """Queue ``message`` for every subscriber of ``stream``; returns its event id.
+
+        ``stream`` None is the session's standalone stream. ``final`` marks
+        the last event of a named stream, after which its subscribers end.
+        """
+        events = self.session_events(session_id)
+        event_id = events.next_id
+        events.next_id += 1
+        events.last_active = time.monotonic()
+
+        # Serialized once and shared by the replay buffer and all subscribers
+        frame = b"id: %d\ndata: %s\n\n" % (event_id, to_json(message))
+        events.buffer.append(Event(event_id, stream, frame, final))
+        for subscriber in events.subscribers:
+            if subscriber.stream == stream:
+                self.deliver(subscriber, frame)
+                if final:
+                    self.finish(subscriber)
+        return event_id
+
+    def deliver(self, subscriber: Subscriber, frame: bytes):
+        if subscriber.closed:
+            return
+        try:
+            subscriber.queue.put_nowait(frame)
+            return
+        except asyncio.QueueFull:
+            pass
+
+        if self.overflow_policy == OverflowPolicy.DROP_OLDEST:
+            subscriber.queue.get_nowait()
+            subscriber.queue.put_nowait(frame)
+        elif self.overflow_policy == OverflowPolicy.DISCONNECT:
+            subscriber.closed = True
+
+    def finish(self, subscriber: Subscriber):
+        try:
+            subscriber.queue.put_nowait(END)
+        except asyncio.QueueFull:
+            # Ends without the queued frames; the client resumes from Last-Event-ID
+            subscriber.closed = True
+
+    def subscribe(
+        self,
+        session_id: str,
+        last_event_id: Optional[str] = None,
+        stream: Optional[str] = None
+    ) -> Tuple[Subscriber, List[bytes], bool]:
+        """Register a stream and return it with the frames it missed.
+
+        With ``last_event_id`` the subscriber joins the stream that event was
+        published on and gets the later events of that stream. Subscribing to
+        a named stream without one replays it from the start. The flag
+        returned is True when the replay already includes the final event.
+        """
+        events = self.session_events(session_id)
+        events.last_active = time.monotonic()
+
+        after = None
+        if last_event_id is not None:
+            try:
+                after = int(last_event_id)
+            except ValueError:
+                pass
+            for event in events.buffer:
+                if event.id == after:
+                    stream = event.stream
+                    break
+            else:
+                after = None
+        if after is None and stream is not None:
+            after = 0
+
+        missed = []
+        ended = False
+        if after is not None:
+            for event in events.buffer:
+                if event.id > after and event.stream == stream:
+                    missed.append(event.frame)
+                    ended = event.final
+
+        subscriber = Subscriber(self.queue_size, stream)
+        if not ended:
+            events.subscribers.add(subscriber)
+            self.stream_count += 1
+        return subscriber, missed, ended
+
+    def unsubscribe(self, session_id: str, subscriber: Subscriber):
+        self.stream_count -= 1
+        events = self.sessions.get(session_id)
+        if events is not None:
+            events.subscribers.discard(subscriber)
+            events.last_active = time.monotonic()
+
+    def discard(self, session_id: str):
+        """Close a session's streams and drop its replay buffer"""
+        events = self.sessions.pop(session_id, None)
+        if events is not None:
+            for subscriber in events.subscribers:
+                subscriber.closed = True
+                with contextlib.suppress(asyncio.QueueFull):
+                    subscriber.queue.put_nowait(HEARTBEAT)
+
+    async def stream(
+        self,
+        session_id: str,
+        last_event_id: Optional[str] = None,
+        stream: Optional[str] = None
+    ) -> AsyncIterator[bytes]:
+        """SSE body for one client; wakes only for events and heartbeats"""
+        subscriber, missed, ended = self.subscribe(session_id, last_event_id, stream)
+        if ended:
+            for frame in missed:
+                yield frame
+            return
+        try:
+            for frame in missed:
+                yield frame
+            while True:
+                frame = await subscriber.queue.get()
+                if subscriber.closed or frame is END:
+                    break
+                yield frame
+        finally:
+            self.unsubscribe(session_id, subscriber)
+
+    def tick(self):
+        """Heartbeat every stream and drop sessions abandoned past ``retention``"""
+        idle_before = time.monotonic() - self.retention
+        for session_id, events in list(self.sessions.items()):
+            if not events.subscribers and events.last_active < idle_before:
+                del self.sessions[session_id]
+                continue
+            for subscriber in events.subscribers:
+                # A full queue means the stream is busy, not idle
+                with contextlib.suppress(asyncio.QueueFull):
+                    subscriber.queue.put_nowait(HEARTBEAT)
+
+    def start_heartbeat(self):
+        async def heartbeat_forever():
+            while True:
+                await asyncio.sleep(self.heartbeat_interval)
+                self.tick()
+
+        self.heartbeat = asyncio.create_task(heartbeat_forever())
+
+    async def close(self):
+        if self.heartbeat is not None:
+            self.heartbeat.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self.heartbeat
+            self.heartbeat = None
+        for session_id in list(self.sessions):
+            self.discard(session_id)
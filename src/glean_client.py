@@ -0,0 +1,254 @@
+"""Async client for the Glean REST API.
+
+Python counterpart of ``src/common/client.ts`` covering the ``search``,
+``chat`` and ``summarize`` operations in ``openapi.yaml``, plus streamed
+``chat`` (``stream: true``) yielding response lines as they arrive. A single
+``httpx.AsyncClient`` keeps connections to Glean alive between calls,
+retryable failures (429, 5xx, dropped connections) are retried with
+jittered exponential backoff, and identical ``search`` calls that are in
+flight at the same time share one upstream request.
+
+Required environment variables:
+- GLEAN_SUBDOMAIN: Subdomain of the Glean instance
+- GLEAN_API_TOKEN: API token for authentication
+
+Optional environment variables:
+- GLEAN_ACT_AS: User to impersonate (only valid with global tokens)
+- GLEAN_BASE_URL: Override the API base URL, e.g. for a local stub server
+"""
+
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+import asyncio
+import json
+import os
+import random
+
+import httpx
+from pydantic_core import from_json, to_json
+
+from . import metrics
+
+# Upstream statuses worth retrying
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Upper bound on how long a Retry-After header can make us wait
+MAX_RETRY_AFTER = 30
+
+class GleanError(Exception):
+    """Error returned by, or raised while talking to, the Glean API"""
+
+    def __init__(self, message: str, status: int, response: Any = None):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.response = response
+
+class GleanClient:
+    def __init__(
+        self,
+        subdomain: Optional[str],
+        token: str,
+        act_as: Optional[str] = None,
+        base_url: Optional[str] = None,
+        timeout: float = 30,
+        max_connections: int = 100,
+        max_keepalive_connections: Optional[int] = None,
+        max_retries: int = 3,
+        backoff: float = 0.25
+    ):
+        if base_url is None:
+            base_url = f"https://{subdomain}-be.glean.com/rest/api/v1/"
+        if max_keepalive_connections is None:
+            # Connections beyond the keep-alive limit are closed after each
+            # request, so under load a lower limit means reconnecting
+            max_keepalive_connections = max_connections
+        self.act_as = act_as
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.http = httpx.AsyncClient(
+            base_url=base_url,
+            headers={
+                "Authorization": f"Bearer {token}",
+                "Content-Type": "application/json",
+            },
+            timeout=httpx.Timeout(timeout, connect=min(timeout, 10)),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=30,
+            ),
+        )
+        # Shared futures for identical searches currently in flight
+        self.in_flight: Dict[Tuple[Optional[str], str], asyncio.Future] = {}
+
+    @classmethod
+    def from_env(cls, **options) -> "GleanClient":
+        """Create a client from GLEAN_* environment variables"""
+        subdomain = os.environ.get("GLEAN_SUBDOMAIN")
+        token = os.environ.get("GLEAN_API_TOKEN")
+        base_url = os.environ.get("GLEAN_BASE_URL")
+
+        if not subdomain and not base_url:
+            raise ValueError("GLEAN_SUBDOMAIN environment variable is required")
+
+        if not token:
+            raise ValueError("GLEAN_API_TOKEN environment variable is required")
+
+        return cls(
+            subdomain,
+            token,
+            act_as=os.environ.get("GLEAN_ACT_AS") or None,
+            base_url=base_url,
+            **options
+        )
+
+    def headers_for(self, act_as: Optional[str]) -> Optional[Dict[str, str]]:
+        act_as = act_as or self.act_as
+        return {"X-Scio-Actas": act_as} if act_as else None
+
+    def retry_delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        """Full-jitter exponential backoff, honouring a numeric Retry-After"""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after is not None:
+                try:
+                    return min(float(retry_after), MAX_RETRY_AFTER)
+                except ValueError:
+                    pass
+        return random.uniform(0, self.backoff * (2 ** attempt))
+
+    async def request(self, endpoint: str, body: Any, act_as: Optional[str] = None) -> Any:
+        """POST ``body`` to ``endpoint``, retrying transient failures"""
+        content = to_json(body)
+        headers = self.headers_for(act_as)
+
+        attempt = 0
+        while True:
+            try:
+                with metrics.upstream_call():
+                    response = await self.http.post(endpoint, content=content, headers=headers)
+            except httpx.TransportError as error:
+                if attempt >= self.max_retries:
+                    raise GleanError(
+                        f"Failed to connect to Glean API: {error}", 500, {"error": str(error)}
+                    ) from error
+                await asyncio.sleep(self.retry_delay(attempt))
+                attempt += 1
+                continue
+
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                await asyncio.sleep(self.retry_delay(attempt, response))
+                attempt += 1
+                continue
+
+            return self.parse_response(response)
+
+    def parse_response(self, response: httpx.Response) -> Any:
+        try:
+            data = from_json(response.content)
+        except ValueError:
+            data = {"message": response.text}
+
+        if response.is_success:
+            return data
+
+        message = data.get("message") if isinstance(data, dict) else None
+        if response.status_code == 401:
+            if message is None:
+                error_message = "Authentication failed"
+            elif "expired" in str(message):
+                error_message = "Authentication token has expired"
+            elif "Invalid Secret" in str(message):
+                error_message = "Invalid authentication token"
+            else:
+                error_message = str(message)
+        else:
+            error_message = f"Glean API error: {response.reason_phrase}"
+
+        raise GleanError(error_message, response.status_code, message)
+
+    async def search(self, params: Dict[str, Any], act_as: Optional[str] = None) -> Any:
+        """Perform a search.
+
+        Concurrent calls with the same body and identity share one upstream
+        request and receive the same result object, which callers must not
+        mutate.
+        """
+        act_as = act_as or self.act_as
+        key = (act_as, json.dumps(params, sort_keys=True, separators=(",", ":")))
+        future = self.in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self.request("search", params, act_as))
+            self.in_flight[key] = future
+            future.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        # One caller being cancelled must not cancel the shared request
+        return await asyncio.shield(future)
+
+    async def chat(self, params: Dict[str, Any], act_as: Optional[str] = None) -> Any:
+        """Initiate or continue a chat conversation with Glean AI"""
+        return await self.request("chat", params, act_as)
+
+    async def chat_stream(self, params: Dict[str, Any], act_as: Optional[str] = None) -> AsyncIterator[Any]:
+        """Chat with ``stream: true``, yielding each ChatResponse line as it arrives.
+
+        Transient failures are retried only until the first line has been
+        yielded; after that they raise ``GleanError``.
+        """
+        content = to_json({**params, "stream": True})
+        headers = self.headers_for(act_as)
+
+        attempt = 0
+        while True:
+            delay = None
+            try:
+                with metrics.upstream_call():
+                    async with self.http.stream("POST", "chat", content=content, headers=headers) as response:
+                        if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                            delay = self.retry_delay(attempt, response)
+                        elif not response.is_success:
+                            await response.aread()
+                            self.parse_response(response)
+                        else:
+                            # Lines may already have been yielded; never retry past here
+                            attempt = self.max_retries
+                            async for line in response.aiter_lines():
+                                if not line.strip():
+                                    continue
+                                try:
+                                    data = from_json(line)
+                                except ValueError:
+                                    raise GleanError("Malformed chat stream from Glean API", 502, line)
+                                yield data
+                            return
+            except httpx.TransportError as error:
+                if attempt >= self.max_retries:
+                    raise GleanError(
+                        f"Failed to connect to Glean API: {error}", 500, {"error": str(error)}
+                    ) from error
+                delay = self.retry_delay(attempt)
+
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def summarize(self, params: Dict[str, Any], act_as: Optional[str] = None) -> Any:
+        """Generate an AI summary of the requested documents"""
+        return await self.request("summarize", params, act_as)
+
+    async def close(self):
+        await self.http.aclose()
+
+client_instance: Optional[GleanClient] = None
+
+def get_client(**options) -> GleanClient:
+    """Get the shared client, creating it from the environment on first use"""
+    global client_instance
+    if client_instance is None:
+        client_instance = GleanClient.from_env(**options)
+    return client_instance
+
+async def reset_client():
+    """Close and forget the shared client"""
+    global client_instance
+    if client_instance is not None:
+        await client_instance.close()
+        client_instance = None
@@ -0,0 +1,207 @@
+"""Prometheus metrics for the MCP server.
+
+Hot-path latencies are recorded into ``LatencyHistogram`` children bound
+once at import. They are only observed from the event loop thread, so an
+observation is a bisect and two additions with no lock, roughly a sixth of
+the cost of ``prometheus_client.Histogram.observe``; ``LatencyCollector``
+exposes them as ordinary histograms at scrape time. Gauges that mirror
+existing state (sessions, SSE streams, WebSocket connections, cache size)
+are read by collectors at scrape time instead of being updated per
+request. Setting ``enabled`` to False turns every recording helper into a
+no-op.
+"""
+
+from bisect import bisect_left
+from typing import Callable, Dict, Iterator, List, Optional
+import asyncio
+import contextlib
+import time
+
+from prometheus_client import REGISTRY, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, HistogramMetricFamily, Metric
+from prometheus_client.registry import Collector
+from prometheus_client.utils import floatToGoString
+
+from .search_cache import SearchCache
+
+enabled = True
+
+# Tuned for sub-millisecond local stages up to multi-second upstream calls
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+class LatencyHistogram:
+    """Bucket counts and sum for one label value; not thread-safe"""
+
+    __slots__ = ("counts", "sum")
+
+    def __init__(self):
+        # One count per bucket plus the +Inf overflow, not cumulative
+        self.counts: List[int] = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.sum += value
+
+class LatencyCollector(Collector):
+    """Exposes a labelled family of ``LatencyHistogram`` at scrape time"""
+
+    def __init__(self, name: str, documentation: str, label: str, children: Dict[str, LatencyHistogram]):
+        self.name = name
+        self.documentation = documentation
+        self.label = label
+        self.children = children
+
+    def collect(self) -> Iterator[Metric]:
+        family = HistogramMetricFamily(self.name, self.documentation, labels=[self.label])
+        for value, child in self.children.items():
+            buckets = []
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, child.counts):
+                cumulative += count
+                buckets.append((floatToGoString(bound), cumulative))
+            buckets.append(("+Inf", cumulative + child.counts[-1]))
+            family.add_metric([value], buckets, child.sum)
+        yield family
+
+UPSTREAM_IN_FLIGHT = Gauge(
+    "glean_mcp_upstream_in_flight_requests", "Requests to the Glean API awaiting a response"
+)
+EVENT_LOOP_LAG = Gauge(
+    "glean_mcp_event_loop_lag_seconds", "Most recent event loop scheduling delay"
+)
+EVENT_LOOP_LAG_HISTOGRAM = Histogram(
+    "glean_mcp_event_loop_lag_distribution_seconds",
+    "Event loop scheduling delay",
+    buckets=LATENCY_BUCKETS
+)
+
+# Fixed label sets keep cardinality bounded whatever clients send.
+# Streamed glean_chat calls are timed to their final frame, so they get a
+# label of their own rather than stretching the tail of tools/call.
+METHODS = ("initialize", "ping", "tools/list", "tools/call", "tools/call:stream", "batch", "other")
+STAGES = ("parse", "validate", "dispatch", "upstream", "serialize")
+
+METHOD_LATENCY = {method: LatencyHistogram() for method in METHODS}
+STAGE = {stage: LatencyHistogram() for stage in STAGES}
+
+REGISTRY.register(LatencyCollector(
+    "glean_mcp_request_duration_seconds",
+    "Time to handle a JSON-RPC request, by method",
+    "method",
+    METHOD_LATENCY
+))
+REGISTRY.register(LatencyCollector(
+    "glean_mcp_stage_duration_seconds",
+    "Time spent in each stage of request handling",
+    "stage",
+    STAGE
+))
+
+def observe_stage(stage: str, started: float):
+    """Record the time since ``started`` (a ``time.perf_counter()`` value)"""
+    if enabled:
+        STAGE[stage].observe(time.perf_counter() - started)
+
+def observe_request(method: str, started: float):
+    if enabled:
+        METHOD_LATENCY.get(method, METHOD_LATENCY["other"]).observe(time.perf_counter() - started)
+
+@contextlib.contextmanager
+def upstream_call():
+    """Track an in-flight upstream request and its duration"""
+    if not enabled:
+        yield
+        return
+    started = time.perf_counter()
+    UPSTREAM_IN_FLIGHT.inc()
+    try:
+        yield
+    finally:
+        UPSTREAM_IN_FLIGHT.dec()
+        STAGE["upstream"].observe(time.perf_counter() - started)
+
+class LoopLagSampler:
+    """Measures how late a periodic sleep wakes up"""
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self):
+        async def sample_forever():
+            loop = asyncio.get_running_loop()
+            while True:
+                started = loop.time()
+                await asyncio.sleep(self.interval)
+                lag = max(loop.time() - started - self.interval, 0.0)
+                EVENT_LOOP_LAG.set(lag)
+                EVENT_LOOP_LAG_HISTOGRAM.observe(lag)
+
+        if enabled:
+            self.task = asyncio.create_task(sample_forever())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self.task
+            self.task = None
+
+class ServerCollector(Collector):
+    """Reads session, stream and connection counts at scrape time"""
+
+    def __init__(
+        self,
+        active_sessions: Callable[[], int],
+        open_streams: Callable[[], int],
+        open_websockets: Callable[[], int]
+    ):
+        self.active_sessions = active_sessions
+        self.open_streams = open_streams
+        self.open_websockets = open_websockets
+
+    def collect(self) -> Iterator[Metric]:
+        yield GaugeMetricFamily(
+            "glean_mcp_active_sessions", "Sessions in the session store", value=self.active_sessions()
+        )
+        yield GaugeMetricFamily(
+            "glean_mcp_sse_streams", "Open SSE event streams", value=self.open_streams()
+        )
+        yield GaugeMetricFamily(
+            "glean_mcp_websocket_connections", "Open WebSocket connections", value=self.open_websockets()
+        )
+
+class SearchCacheCollector(Collector):
+    """Reads the search cache's counters at scrape time"""
+
+    def __init__(self, cache: SearchCache):
+        self.cache = cache
+
+    def collect(self) -> Iterator[Metric]:
+        cache = self.cache
+        yield CounterMetricFamily(
+            "glean_mcp_search_cache_hits", "Searches served fresh from cache", value=cache.hits
+        )
+        yield CounterMetricFamily(
+            "glean_mcp_search_cache_stale_hits",
+            "Searches served stale from cache while refreshing",
+            value=cache.stale_hits
+        )
+        yield CounterMetricFamily(
+            "glean_mcp_search_cache_misses", "Searches sent upstream", value=cache.misses
+        )
+        yield CounterMetricFamily(
+            "glean_mcp_search_cache_evictions",
+            "Entries evicted to stay under the size bound",
+            value=cache.evictions
+        )
+        yield GaugeMetricFamily(
+            "glean_mcp_search_cache_bytes", "Serialized size of cached results", value=cache.total_bytes
+        )
+        yield GaugeMetricFamily(
+            "glean_mcp_search_cache_entries", "Cached search results", value=len(cache.entries)
+        )
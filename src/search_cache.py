@@ -0,0 +1,137 @@
+"""Response cache in front of the ``glean_search`` tool.
+
+Entries are keyed on a canonical form of the search request together with
+the identity the search runs as, so results are never shared between users
+with different permissions. The cache is bounded by the total size of the
+serialized results rather than by entry count. Entries past their TTL are
+still served for a grace period while a background task refreshes them.
+"""
+
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+import asyncio
+import copy
+import json
+import time
+
+class CacheEntry:
+    __slots__ = ("value", "size", "fresh_until", "stale_until", "refreshing")
+
+    def __init__(self, value: str, size: int, fresh_until: float, stale_until: float):
+        self.value = value
+        self.size = size
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+        self.refreshing = False
+
+def canonical_search(params: Dict[str, Any]) -> str:
+    """Canonical JSON for a search request.
+
+    Query whitespace is collapsed and facet filters, and the values within
+    each, are sorted so equivalent requests produce the same key.
+    """
+    params = copy.deepcopy(params)
+    if isinstance(params.get("query"), str):
+        params["query"] = " ".join(params["query"].split())
+
+    options = params.get("requestOptions")
+    if isinstance(options, dict):
+        if isinstance(options.get("facetFilters"), list):
+            options["facetFilters"] = sort_facet_filters(options["facetFilters"])
+        if isinstance(options.get("facetFilterSets"), list):
+            for filter_set in options["facetFilterSets"]:
+                if isinstance(filter_set, dict) and isinstance(filter_set.get("filters"), list):
+                    filter_set["filters"] = sort_facet_filters(filter_set["filters"])
+
+    return json.dumps(params, sort_keys=True, separators=(",", ":"))
+
+def sort_facet_filters(filters: list) -> list:
+    for facet_filter in filters:
+        if isinstance(facet_filter, dict) and isinstance(facet_filter.get("values"), list):
+            facet_filter["values"].sort(key=lambda value: json.dumps(value, sort_keys=True))
+    return sorted(filters, key=lambda facet_filter: json.dumps(facet_filter, sort_keys=True))
+
+class SearchCache:
+    def __init__(
+        self,
+        ttl: float = 30,
+        stale_ttl: float = 300,
+        max_bytes: int = 64 * 1024 * 1024
+    ):
+        self.ttl = ttl
+        # How long past its TTL an entry may be served while it is refreshed
+        self.stale_ttl = stale_ttl
+        self.max_bytes = max_bytes
+        # No single result may take more than a quarter of the cache
+        self.max_entry_bytes = max_bytes // 4
+        self.entries: "OrderedDict[Tuple[str, str], CacheEntry]" = OrderedDict()
+        self.total_bytes = 0
+        self.refreshes: Set[asyncio.Task] = set()
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def fetch(
+        self,
+        params: Dict[str, Any],
+        identity: Optional[str],
+        load: Callable[[], Awaitable[str]]
+    ) -> str:
+        """Return the cached serialized result for ``params``, loading it on a miss"""
+        key = (identity or "", canonical_search(params))
+        entry = self.entries.get(key)
+        now = time.monotonic()
+
+        if entry is not None:
+            if now < entry.fresh_until:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return entry.value
+            if now < entry.stale_until:
+                self.stale_hits += 1
+                self.entries.move_to_end(key)
+                if not entry.refreshing:
+                    entry.refreshing = True
+                    task = asyncio.create_task(self.refresh(key, entry, load))
+                    self.refreshes.add(task)
+                    task.add_done_callback(self.refreshes.discard)
+                return entry.value
+
+        self.misses += 1
+        value = await load()
+        self.store(key, value)
+        return value
+
+    async def refresh(self, key: Tuple[str, str], entry: CacheEntry, load: Callable[[], Awaitable[str]]):
+        try:
+            value = await load()
+        except Exception:
+            # Keep serving the stale entry until it runs out
+            entry.refreshing = False
+            return
+        self.store(key, value)
+
+    def store(self, key: Tuple[str, str], value: str):
+        size = len(value.encode())
+        self.discard(key)
+        if size > self.max_entry_bytes:
+            return
+
+        now = time.monotonic()
+        self.entries[key] = CacheEntry(value, size, now + self.ttl, now + self.ttl + self.stale_ttl)
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.total_bytes -= evicted.size
+            self.evictions += 1
+
+    def discard(self, key: Tuple[str, str]):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry.size
+
+    def clear(self):
+        self.entries.clear()
+        self.total_bytes = 0
@@ -1,12 +1,30 @@
-from fastapi import FastAPI, WebSocket, Request, Response, Header, HTTPException
-from fastapi.responses import JSONResponse, StreamingResponse
-from pydantic import BaseModel
-from typing import Optional, Dict, Any, List
-import uuid
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request, Response, Header, HTTPException
+from fastapi.responses import StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+from pydantic import (
+    BaseModel, SerializerFunctionWrapHandler, StrictInt, StrictStr, TypeAdapter, ValidationError,
+    model_serializer
+)
+from pydantic_core import from_json, to_json
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing_extensions import NotRequired, TypedDict
+from typing import Optional, Dict, Any, AsyncContextManager, AsyncIterator, Awaitable, Callable, List, Set, Union
+import contextlib
+import itertools
+import os
+import time
 import json
 import asyncio
 from enum import Enum
 
+from .events import EventBus, OverflowPolicy
+from .glean_client import GleanError, get_client, reset_client
+from . import metrics
+from .metrics import LoopLagSampler, SearchCacheCollector, ServerCollector
+from .search_cache import SearchCache
+from .sessions import SessionBackendType, SessionManager, create_session_backend
+
 class TransportType(str, Enum):
     HTTP = "http"
     STDIO = "stdio"
@@ -14,133 +32,746 @@ class TransportType(str, Enum):
 class ServerConfig(BaseModel):
     host: str = "0.0.0.0"
     port: int = 8000
+    # uvicorn's log level when started through run()
+    log_level: str = "info"
     transport_type: TransportType = TransportType.HTTP
     auth_enabled: bool = True
     timeout: int = 30
+    # JSON-RPC batches on /v1/mcp
+    max_batch_size: int = 100
+    batch_concurrency: int = 8
+    session_concurrency: int = 16
+    # Sessions; use the sqlite backend when running more than one worker
+    session_backend: SessionBackendType = SessionBackendType.MEMORY
+    session_db_path: str = "/tmp/glean-mcp-sessions.db"
+    session_ttl: float = 3600
+    max_sessions: int = 10000
+    session_sweep_interval: float = 30
+    # SSE streams
+    sse_queue_size: int = 256
+    sse_replay_size: int = 256
+    sse_overflow_policy: OverflowPolicy = OverflowPolicy.DISCONNECT
+    sse_heartbeat_interval: float = 15
+    # Upstream Glean connection pool; requests time out after `timeout` seconds
+    glean_max_connections: int = 100
+    # Defaults to glean_max_connections
+    glean_max_keepalive_connections: Optional[int] = None
+    glean_max_retries: int = 3
+    # glean_search response cache
+    search_cache_enabled: bool = True
+    search_cache_ttl: float = 30
+    search_cache_stale_ttl: float = 300
+    search_cache_max_bytes: int = 64 * 1024 * 1024
+    # Prometheus instrumentation
+    metrics_enabled: bool = True
+    event_loop_lag_interval: float = 0.5
+    # /v1/mcp/ws
+    websocket_max_in_flight: int = 32
+    websocket_compression: bool = True
 
-class MCPMessage(BaseModel):
-    jsonrpc: str = "2.0"
-    id: Optional[str] = None
+    @classmethod
+    def from_env(cls, prefix: str = "MCP_") -> "ServerConfig":
+        """Build a config, overriding defaults with ``MCP_<FIELD>`` environment variables"""
+        values = {
+            name: os.environ[prefix + name.upper()]
+            for name in cls.model_fields
+            if prefix + name.upper() in os.environ
+        }
+        return cls(**values)
+
+# JSON-RPC ids may be strings or integers. Strict, so an id is echoed back
+# exactly as sent and anything else (true, 1.5) is an invalid request.
+RequestId = Union[StrictStr, StrictInt, None]
+
+class MCPMessage(TypedDict):
+    jsonrpc: NotRequired[str]
+    id: NotRequired[RequestId]
     method: str
-    params: Optional[Dict[str, Any]] = None
+    params: NotRequired[Optional[Dict[str, Any]]]
 
 class MCPResponse(BaseModel):
     jsonrpc: str = "2.0"
-    id: str
+    id: RequestId = None
     result: Optional[Dict[str, Any]] = None
     error: Optional[Dict[str, Any]] = None
 
-class SessionManager:
-    def __init__(self):
-        self.sessions: Dict[str, Dict[str, Any]] = {}
-    
-    def create_session(self) -> str:
-        session_id = str(uuid.uuid4())
-        self.sessions[session_id] = {"created_at": asyncio.get_event_loop().time()}
-        return session_id
-    
-    def validate_session(self, session_id: str) -> bool:
-        return session_id in self.sessions
-    
-    def remove_session(self, session_id: str):
-        if session_id in self.sessions:
-            del self.sessions[session_id]
+    @model_serializer(mode="wrap")
+    def serialize(self, handler: SerializerFunctionWrapHandler) -> Dict[str, Any]:
+        # A response carries exactly one of result and error; id stays even when null
+        data = handler(self)
+        del data["result" if self.error is not None else "error"]
+        return data
 
-app = FastAPI(title="Glean MCP Server")
-session_manager = SessionManager()
+# Compiled once at import; validating into a plain dict is roughly twice as
+# fast as constructing a model per request.
+validate_mcp_message = TypeAdapter(MCPMessage).validate_python
 
-@app.middleware("http")
-async def session_middleware(request: Request, call_next):
-    # Check for session header in non-initialization requests
-    session_id = request.headers.get("Mcp-Session-Id")
-    
-    # Allow session creation for new connections
-    if request.url.path == "/v1/mcp" and request.method == "POST":
-        message = await request.json()
-        if isinstance(message, dict) and message.get("method") == "initialize":
-            if not session_id:
-                session_id = session_manager.create_session()
-                response = await call_next(request)
-                response.headers["Mcp-Session-Id"] = session_id
-                return response
-    
-    # Validate existing sessions
-    if session_id and not session_manager.validate_session(session_id):
-        return JSONResponse(
-            status_code=404,
-            content={"error": "Session not found"}
-        )
-    
-    return await call_next(request)
+class MCPJSONResponse(Response):
+    """JSON response rendered by pydantic-core's serializer.
+
+    Accepts an ``MCPResponse`` or any JSON-compatible value and skips the
+    ``model.dict()`` + ``json.dumps`` round trip of ``JSONResponse``.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        started = time.perf_counter()
+        body = to_json(content)
+        metrics.observe_stage("serialize", started)
+        return body
+
+# Left in request.state.mcp_message when the body is not valid JSON
+PARSE_ERROR = object()
+
+def error_response(code: int, message: str, id: RequestId = None) -> MCPResponse:
+    return MCPResponse(id=id, error={"code": code, "message": message})
+
+with open(os.path.join(os.path.dirname(__file__), "..", "package.json")) as package_json:
+    VERSION = json.load(package_json)["version"]
+
+PROTOCOL_VERSION = "2025-03-26"
+
+TOOL_NAMES = {
+    "search": "glean_search",
+    "chat": "glean_chat",
+}
+
+TOOLS = [
+    {
+        "name": TOOL_NAMES["search"],
+        "description": "Search Glean Enterprise Knowledge",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "query": {"type": "string", "description": "The search terms"},
+                "pageSize": {"type": "number", "description": "Number of results to return"},
+                "cursor": {"type": "string", "description": "Pagination cursor for position in overall results"},
+                "requestOptions": {"type": "object", "description": "Options for the search request"},
+            },
+            "required": ["query"],
+        },
+    },
+    {
+        "name": TOOL_NAMES["chat"],
+        "description": "Chat with Glean Assistant using Glean's RAG",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "messages": {
+                    "type": "array",
+                    "items": {"type": "object"},
+                    "description": "List of chat messages, from most recent to least recent",
+                },
+            },
+            "required": ["messages"],
+        },
+    },
+]
+
+config = ServerConfig.from_env()
+session_manager = SessionManager(
+    create_session_backend(
+        config.session_backend, config.max_sessions, config.session_db_path
+    ),
+    ttl=config.session_ttl,
+    concurrency=config.session_concurrency
+)
+event_bus = EventBus(
+    queue_size=config.sse_queue_size,
+    replay_size=config.sse_replay_size,
+    overflow_policy=config.sse_overflow_policy,
+    heartbeat_interval=config.sse_heartbeat_interval,
+    retention=config.session_ttl
+)
+search_cache = SearchCache(
+    ttl=config.search_cache_ttl,
+    stale_ttl=config.search_cache_stale_ttl,
+    max_bytes=config.search_cache_max_bytes
+)
+loop_lag_sampler = LoopLagSampler(config.event_loop_lag_interval)
+# Streamed calls that outlive the request that started them
+background_tasks: Set[asyncio.Task] = set()
+# Names the event bus stream of each streamed POST response
+stream_ids = itertools.count(1)
+open_websockets: Set[WebSocket] = set()
+metrics.enabled = config.metrics_enabled
+REGISTRY.register(SearchCacheCollector(search_cache))
+REGISTRY.register(ServerCollector(
+    lambda: len(session_manager.backend),
+    lambda: event_bus.stream_count,
+    lambda: len(open_websockets)
+))
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    session_manager.start_sweeper(config.session_sweep_interval)
+    event_bus.start_heartbeat()
+    loop_lag_sampler.start()
+    yield
+    for task in background_tasks:
+        task.cancel()
+    await loop_lag_sampler.stop()
+    await event_bus.close()
+    await session_manager.close()
+    await reset_client()
+
+app = FastAPI(title="Glean MCP Server", lifespan=lifespan)
+
+async def read_body(receive: Receive) -> bytes:
+    """Drain the ASGI request body"""
+    chunks = []
+    more_body = True
+    while more_body:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunks.append(message.get("body", b""))
+        more_body = message.get("more_body", False)
+    return b"".join(chunks)
+
+def request_method(message: Any, streaming: bool) -> str:
+    """Metrics label for a decoded request body.
+
+    ``streaming`` says whether the transport answers glean_chat calls as a
+    stream.
+    """
+    if isinstance(message, list):
+        return "batch"
+    if streaming and is_chat_call(message):
+        return "tools/call:stream"
+    if isinstance(message, dict) and isinstance(message.get("method"), str):
+        return message["method"]
+    return "other"
+
+def replay_body(body: bytes, receive: Receive) -> Receive:
+    """Return a receive callable that yields ``body`` once, then defers to ``receive``"""
+    sent = False
+
+    async def replay() -> Message:
+        nonlocal sent
+        if sent:
+            return await receive()
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return replay
+
+def with_session_header(send: Send, session_id: str) -> Send:
+    """Return a send callable that adds ``Mcp-Session-Id`` to the response"""
+    async def send_with_header(message: Message):
+        if message["type"] == "http.response.start":
+            MutableHeaders(scope=message)["Mcp-Session-Id"] = session_id
+        await send(message)
+
+    return send_with_header
+
+class SessionMiddleware:
+    """Pure-ASGI session layer.
+
+    POST bodies to /v1/mcp are read and decoded exactly once here; the result
+    is left in ``scope["state"]`` for the endpoint, and the raw bytes are
+    replayed so downstream ``request.body()`` calls still work.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Check for session header in non-initialization requests
+        headers = Headers(scope=scope)
+        session_id = headers.get("mcp-session-id")
+
+        # Allow session creation for new connections
+        if scope["path"] == "/v1/mcp" and scope["method"] == "POST":
+            started = time.perf_counter()
+            body = await read_body(receive)
+            parse_started = time.perf_counter()
+            try:
+                message = from_json(body)
+            except ValueError:
+                message = PARSE_ERROR
+            metrics.observe_stage("parse", parse_started)
+            scope.setdefault("state", {})["mcp_message"] = message
+            receive = replay_body(body, receive)
+
+            try:
+                if isinstance(message, dict) and message.get("method") == "initialize":
+                    if not session_id:
+                        session_id = await session_manager.create_session()
+                        await self.app(scope, receive, with_session_header(send, session_id))
+                        return
+                await self.handle(scope, receive, send, session_id)
+            finally:
+                streaming = "text/event-stream" in headers.get("accept", "")
+                metrics.observe_request(request_method(message, streaming), started)
+            return
+
+        await self.handle(scope, receive, send, session_id)
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send, session_id: Optional[str]):
+        # Validate existing sessions
+        if session_id and not session_manager.validate_session(session_id):
+            response = MCPJSONResponse(
+                status_code=404,
+                content={"error": "Session not found"}
+            )
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
+
+app.add_middleware(SessionMiddleware)
 
 @app.post("/v1/mcp")
 async def mcp_endpoint(
     request: Request,
     accept: str = Header(...),
-    mcp_session_id: Optional[str] = Header(None, alias="Mcp-Session-Id")
+    mcp_session_id: Optional[str] = Header(None, alias="Mcp-Session-Id"),
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID")
 ):
     """Main MCP endpoint handling both regular JSON-RPC messages and SSE streams"""
-    
+    # Already decoded by SessionMiddleware
+    message = request.state.mcp_message
+
+    # Stream glean_chat answers as they arrive when the client accepts SSE
+    if "text/event-stream" in accept and is_chat_call(message):
+        try:
+            mcp_message = validate(message)
+        except ValidationError:
+            return MCPJSONResponse(
+                status_code=400,
+                content=error_response(-32600, "Invalid Request")
+            )
+        if mcp_session_id:
+            # Published through the event bus so a dropped stream can be resumed
+            stream = f"post-{next(stream_ids)}"
+            run_in_background(publish_chat(mcp_session_id, stream, mcp_message))
+            frames = event_bus.stream(mcp_session_id, stream=stream)
+        else:
+            frames = sse_frames(stream_chat(mcp_message))
+        return StreamingResponse(
+            frames,
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
     # Handle POST requests for sending messages
     if "application/json" in accept:
-        message = await request.json()
-        
+        if message is PARSE_ERROR:
+            return MCPJSONResponse(
+                status_code=400,
+                content=error_response(-32700, "Parse error")
+            )
+
+        # JSON-RPC batch
+        if isinstance(message, list):
+            if not message or len(message) > config.max_batch_size:
+                return MCPJSONResponse(
+                    status_code=400,
+                    content=error_response(-32600, "Invalid Request")
+                )
+            responses = await process_mcp_batch(message, mcp_session_id)
+            if not responses:
+                # Batch held only notifications
+                return Response(status_code=202)
+            return MCPJSONResponse(content=responses)
+
         # Validate JSON-RPC message
         try:
-            mcp_message = MCPMessage(**message)
-        except Exception as e:
-            return JSONResponse(
+            mcp_message = validate(message)
+        except ValidationError:
+            return MCPJSONResponse(
                 status_code=400,
-                content={
-                    "jsonrpc": "2.0",
-                    "error": {
-                        "code": -32700,
-                        "message": "Parse error"
-                    }
-                }
+                content=error_response(-32600, "Invalid Request")
             )
-        
-        # Handle initialize method specially
-        if mcp_message.method == "initialize":
-            # Implementation will be added
-            pass
-        
+
         # Process regular MCP message
-        response = await process_mcp_message(mcp_message)
-        return JSONResponse(content=response.dict())
+        try:
+            async with session_limit(mcp_session_id):
+                response = await process_mcp_message(mcp_message)
+        except Exception:
+            response = error_response(-32603, "Internal error", mcp_message.get("id"))
+
+        if "id" not in mcp_message:
+            # Notifications get no response
+            return Response(status_code=202)
+        return MCPJSONResponse(content=response)
     
     # Handle SSE streaming
     elif "text/event-stream" in accept:
-        return StreamingResponse(
-            stream_mcp_events(mcp_session_id),
-            media_type="text/event-stream"
-        )
+        return event_stream_response(mcp_session_id, last_event_id)
     
     raise HTTPException(status_code=406, detail="Not Acceptable")
 
+@app.get("/v1/mcp")
+async def mcp_stream_endpoint(
+    accept: str = Header(...),
+    mcp_session_id: Optional[str] = Header(None, alias="Mcp-Session-Id"),
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID")
+):
+    """Open the session's SSE stream, or resume one with ``Last-Event-ID``"""
+    if "text/event-stream" not in accept:
+        raise HTTPException(status_code=406, detail="Not Acceptable")
+    return event_stream_response(mcp_session_id, last_event_id)
+
+def event_stream_response(session_id: Optional[str], last_event_id: Optional[str]) -> StreamingResponse:
+    if not session_id:
+        raise HTTPException(status_code=400, detail="Mcp-Session-Id header required")
+    return StreamingResponse(
+        stream_mcp_events(session_id, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def glean():
+    """Shared upstream Glean client, pooled according to ``config``"""
+    return get_client(
+        timeout=config.timeout,
+        max_connections=config.glean_max_connections,
+        max_keepalive_connections=config.glean_max_keepalive_connections,
+        max_retries=config.glean_max_retries
+    )
+
+def session_limit(session_id: Optional[str]) -> AsyncContextManager:
+    """Slot in the session's ``config.session_concurrency`` dispatch cap"""
+    if session_id:
+        return session_manager.session_semaphore(session_id)
+    return contextlib.nullcontext()
+
+def validate(message: Any) -> MCPMessage:
+    started = time.perf_counter()
+    try:
+        return validate_mcp_message(message)
+    finally:
+        metrics.observe_stage("validate", started)
+
 async def process_mcp_message(message: MCPMessage) -> MCPResponse:
     """Process an MCP message and return a response"""
-    # Implementation will be added
-    pass
+    started = time.perf_counter()
+    try:
+        return await dispatch_mcp_message(message)
+    finally:
+        metrics.observe_stage("dispatch", started)
+
+async def dispatch_mcp_message(message: MCPMessage) -> MCPResponse:
+    id = message.get("id")
+    params = message.get("params") or {}
+    method = message["method"]
+
+    if method == "initialize":
+        return MCPResponse(id=id, result={
+            "protocolVersion": PROTOCOL_VERSION,
+            "capabilities": {"tools": {}},
+            "serverInfo": {"name": "Glean Tools MCP", "version": VERSION},
+        })
+    if method == "ping":
+        return MCPResponse(id=id, result={})
+    if method == "tools/list":
+        return MCPResponse(id=id, result={"tools": TOOLS})
+    if method == "tools/call":
+        return MCPResponse(id=id, result=await call_tool(params.get("name"), params.get("arguments")))
+
+    return error_response(-32601, "Method not found", id)
+
+async def call_tool(name: Optional[str], arguments: Any) -> Dict[str, Any]:
+    """Run a tool and wrap its output, or its failure, as a tool result"""
+    try:
+        check_arguments(arguments)
+
+        if name == TOOL_NAMES["search"]:
+            text = await search(arguments)
+        elif name == TOOL_NAMES["chat"]:
+            text = to_json(await glean().chat(arguments)).decode()
+        else:
+            raise ValueError(f"Unknown tool: {name}")
+    except GleanError as error:
+        return tool_result(f"Glean API Error: {error.message}", is_error=True)
+    except ValueError as error:
+        return tool_result(f"Error: {error}", is_error=True)
+
+    return tool_result(text)
+
+def check_arguments(arguments: Any):
+    """Reject tool arguments that do not match the ``object`` input schema"""
+    if not arguments:
+        raise ValueError("Arguments are required")
+    if not isinstance(arguments, dict):
+        raise ValueError("Arguments must be an object")
+
+async def search(arguments: Dict[str, Any]) -> str:
+    """Serialized search results, served from ``search_cache`` when possible"""
+    client = glean()
+
+    async def load() -> str:
+        return to_json(await client.search(arguments)).decode()
+
+    if not config.search_cache_enabled:
+        return await load()
+    return await search_cache.fetch(arguments, client.act_as, load)
+
+def tool_result(text: str, is_error: bool = False) -> Dict[str, Any]:
+    return {"content": [{"type": "text", "text": text}], "isError": is_error}
+
+def is_chat_call(message: Any) -> bool:
+    if not isinstance(message, dict) or message.get("method") != "tools/call":
+        return False
+    params = message.get("params")
+    return isinstance(params, dict) and params.get("name") == TOOL_NAMES["chat"]
+
+def chat_line_text(line: Any) -> List[str]:
+    """Answer text carried by one streamed ChatResponse line"""
+    texts = []
+    for chat_message in (line.get("messages") if isinstance(line, dict) else None) or []:
+        if chat_message.get("author") != "GLEAN_AI" or chat_message.get("messageType", "CONTENT") != "CONTENT":
+            continue
+        for fragment in chat_message.get("fragments") or []:
+            if fragment.get("text"):
+                texts.append(fragment["text"])
+    return texts
+
+async def stream_chat(message: MCPMessage) -> AsyncIterator[Any]:
+    """Run a glean_chat call with upstream streaming.
+
+    When the request carries ``_meta.progressToken``, yields a
+    ``notifications/progress`` message per chunk of answer text as it
+    arrives from Glean; then yields the call's response with the whole
+    answer. Only the answer text is kept, not the upstream lines.
+    """
+    id = message.get("id")
+    params = message.get("params") or {}
+    arguments = params.get("arguments")
+    meta = params.get("_meta")
+    # Progress may only be reported against a token the client supplied
+    progress_token = meta.get("progressToken") if isinstance(meta, dict) else None
+
+    answer = []
+    try:
+        check_arguments(arguments)
+        async for line in glean().chat_stream(arguments):
+            for text in chat_line_text(line):
+                answer.append(text)
+                if progress_token is None:
+                    continue
+                yield {
+                    "jsonrpc": "2.0",
+                    "method": "notifications/progress",
+                    "params": {
+                        "progressToken": progress_token,
+                        "progress": len(answer),
+                        "message": text,
+                    },
+                }
+    except GleanError as error:
+        result = tool_result(f"Glean API Error: {error.message}", is_error=True)
+    except ValueError as error:
+        result = tool_result(f"Error: {error}", is_error=True)
+    else:
+        result = tool_result(to_json({"messages": [{
+            "author": "GLEAN_AI",
+            "messageType": "CONTENT",
+            "hasMoreFragments": False,
+            "fragments": [{"text": "".join(answer)}],
+        }]}).decode())
+
+    yield MCPResponse(id=id, result=result)
+
+async def sse_frames(messages: AsyncIterator[Any]) -> AsyncIterator[bytes]:
+    async for message in messages:
+        yield b"data: " + to_json(message) + b"\n\n"
+
+async def publish_chat(session_id: str, stream: str, message: MCPMessage):
+    """Run a streamed glean_chat call, publishing its messages on ``stream``.
+
+    Runs to completion even if the client disconnects, so the rest of the
+    answer can be replayed from the event bus with ``Last-Event-ID``.
+    """
+    async with session_limit(session_id):
+        try:
+            async for update in stream_chat(message):
+                event_bus.publish(session_id, update, stream, final=isinstance(update, MCPResponse))
+        except Exception:
+            event_bus.publish(
+                session_id,
+                error_response(-32603, "Internal error", message.get("id")),
+                stream,
+                final=True
+            )
+
+def run_in_background(coroutine: Awaitable[Any]):
+    task = asyncio.ensure_future(coroutine)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+async def process_mcp_batch(
+    messages: List[Any],
+    session_id: Optional[str] = None
+) -> List[MCPResponse]:
+    """Validate and dispatch each message of a batch concurrently.
 
-async def stream_mcp_events(session_id: str):
-    """Stream MCP events for a session"""
-    while True:
-        # Implementation will be added
-        await asyncio.sleep(1)
-        yield "data: {}\n\n"
+    Dispatch is capped per batch by ``config.batch_concurrency`` and, with
+    every other request of the session, by ``session_limit``. Invalid or
+    failing elements produce their own error response; notifications produce
+    none.
+    """
+    batch_limit = asyncio.Semaphore(config.batch_concurrency)
+
+    async def dispatch(message: Any) -> Optional[MCPResponse]:
+        try:
+            mcp_message = validate(message)
+        except ValidationError:
+            return error_response(-32600, "Invalid Request")
+
+        async with batch_limit, session_limit(session_id):
+            try:
+                response = await process_mcp_message(mcp_message)
+            except Exception:
+                response = error_response(-32603, "Internal error", mcp_message.get("id"))
+
+        if "id" not in mcp_message:
+            return None
+        return response
+
+    responses = await asyncio.gather(*(dispatch(message) for message in messages))
+    return [response for response in responses if response is not None]
+
+def stream_mcp_events(session_id: str, last_event_id: Optional[str] = None):
+    """Stream MCP events for a session.
+
+    With ``last_event_id`` this resumes the stream that event belongs to,
+    such as an interrupted glean_chat response, replaying what followed it.
+    """
+    return event_bus.stream(session_id, last_event_id)
+
+class ConnectionLost(Exception):
+    """Raised by a WebSocket ``send`` once the connection has gone away"""
 
 @app.websocket("/v1/mcp/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket endpoint for bi-directional communication"""
+    """WebSocket endpoint for bi-directional communication.
+
+    Messages are dispatched concurrently and each response is sent as soon as
+    it is ready, correlated by ``id``, so a slow call never holds up the ones
+    behind it. Once ``config.websocket_max_in_flight`` calls are running the
+    connection stops reading until one finishes. A ``Mcp-Session-Id`` on the
+    handshake puts the connection's calls under that session's
+    ``session_limit``; every frame refreshes the session, and the socket is
+    closed with 1008 once the session is gone.
+    """
+    session_id = websocket.headers.get("mcp-session-id")
+    if session_id and not session_manager.validate_session(session_id):
+        await websocket.close(code=1008)
+        return
+
     await websocket.accept()
+    open_websockets.add(websocket)
+    in_flight = asyncio.Semaphore(config.websocket_max_in_flight)
+    send_lock = asyncio.Lock()
+    tasks: Set[asyncio.Task] = set()
+
+    async def send(message: Any):
+        started = time.perf_counter()
+        data = to_json(message).decode()
+        metrics.observe_stage("serialize", started)
+        async with send_lock:
+            try:
+                await websocket.send_text(data)
+            except (WebSocketDisconnect, RuntimeError, OSError) as error:
+                raise ConnectionLost from error
+
+    async def handle(data: str):
+        try:
+            await process_websocket_message(data, send, session_id)
+        except ConnectionLost:
+            # The receive loop will notice the connection is gone
+            pass
+        finally:
+            in_flight.release()
+
     try:
         while True:
             data = await websocket.receive_text()
-            # Implementation will be added
-            await websocket.send_text(f"Message received: {data}")
+            # Keeps the session alive while only the socket is in use
+            if session_id and not session_manager.validate_session(session_id):
+                await websocket.close(code=1008)
+                break
+            await in_flight.acquire()
+            task = asyncio.create_task(handle(data))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+    except WebSocketDisconnect:
+        pass
     except Exception:
         await websocket.close()
+    finally:
+        for task in tasks:
+            task.cancel()
+        open_websockets.discard(websocket)
+
+async def process_websocket_message(
+    data: str,
+    send: Callable[[Any], Awaitable[None]],
+    session_id: Optional[str] = None
+):
+    """Handle one WebSocket frame, passing each outgoing message to ``send``"""
+    started = time.perf_counter()
+    try:
+        message = from_json(data)
+    except ValueError:
+        message = PARSE_ERROR
+    metrics.observe_stage("parse", started)
+
+    try:
+        await dispatch_websocket_message(message, send, session_id)
+    finally:
+        # glean_chat is always streamed over the WebSocket
+        metrics.observe_request(request_method(message, True), started)
+
+async def dispatch_websocket_message(
+    message: Any,
+    send: Callable[[Any], Awaitable[None]],
+    session_id: Optional[str]
+):
+    """Answer one decoded WebSocket message.
+
+    Failures other than ``send`` raising ``ConnectionLost`` are answered with
+    an internal error, so every call gets a reply.
+    """
+    if message is PARSE_ERROR:
+        await send(error_response(-32700, "Parse error"))
+        return
+
+    if isinstance(message, list):
+        if not message or len(message) > config.max_batch_size:
+            await send(error_response(-32600, "Invalid Request"))
+            return
+        responses = await process_mcp_batch(message, session_id)
+        if responses:
+            await send(responses)
+        return
+
+    try:
+        mcp_message = validate(message)
+    except ValidationError:
+        await send(error_response(-32600, "Invalid Request"))
+        return
+
+    try:
+        async with session_limit(session_id):
+            if is_chat_call(mcp_message):
+                async for update in stream_chat(mcp_message):
+                    await send(update)
+                return
+            response = await process_mcp_message(mcp_message)
+    except ConnectionLost:
+        raise
+    except Exception:
+        response = error_response(-32603, "Internal error", mcp_message.get("id"))
+    if "id" in mcp_message:
+        await send(response)
 
 @app.get("/health")
 async def health_check():
@@ -148,12 +779,21 @@ async def health_check():
     return {"status": "healthy"}
 
 @app.get("/metrics")
-async def metrics():
+async def metrics_endpoint():
     """Prometheus metrics endpoint"""
-    # Implementation will be added
-    return {"metrics": "Not implemented"}
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
 
-if __name__ == "__main__":
+def run(asgi_app: ASGIApp = app):
+    """Serve ``asgi_app`` with uvicorn using the host, port, logging and WebSocket settings in ``config``"""
     import uvicorn
-    config = ServerConfig()
-    uvicorn.run(app, host=config.host, port=config.port) 
\ No newline at end of file
+    uvicorn.run(
+        asgi_app,
+        host=config.host,
+        port=config.port,
+        log_level=config.log_level,
+        ws="websockets",
+        ws_per_message_deflate=config.websocket_compression
+    )
+
+if __name__ == "__main__":
+    run() 
\ No newline at end of file
@@ -0,0 +1,318 @@
+"""Session storage for the MCP HTTP transport.
+
+Sessions are compact ``Session`` records held by a pluggable backend:
+``MemorySessionBackend`` for a single process, or ``SQLiteSessionBackend``
+to share sessions between uvicorn workers. Idle sessions are expired and
+the store is trimmed to its size cap by ``SessionManager``'s background
+sweeper, so request handling never scans the store. Backends whose writes
+can block (on another process's database lock) have them run in a thread,
+keeping the event loop free.
+"""
+
+from collections import OrderedDict
+from enum import Enum
+from typing import Any, Callable, Dict, Optional, Tuple
+import asyncio
+import contextlib
+import sqlite3
+import threading
+import time
+import uuid
+
+class SessionBackendType(str, Enum):
+    MEMORY = "memory"
+    SQLITE = "sqlite"
+
+class Session:
+    """A single MCP session"""
+
+    __slots__ = ("id", "created_at", "last_seen")
+
+    def __init__(self, id: str, created_at: float, last_seen: Optional[float] = None):
+        self.id = id
+        self.created_at = created_at
+        self.last_seen = created_at if last_seen is None else last_seen
+
+class SessionBackend:
+    """Storage interface for session records.
+
+    Timestamps are wall-clock seconds so records stay meaningful across
+    processes. ``get`` and ``touch`` are called on the event loop for every
+    request and must not block; when ``blocking_writes`` is set, ``add``,
+    ``remove`` and ``evict`` are run in a worker thread instead.
+    """
+
+    blocking_writes = False
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+
+    def add(self, session: Session):
+        raise NotImplementedError
+
+    def get(self, session_id: str) -> Optional[Session]:
+        raise NotImplementedError
+
+    def touch(self, session_id: str, now: float):
+        raise NotImplementedError
+
+    def remove(self, session_id: str):
+        raise NotImplementedError
+
+    def evict(self, idle_before: float) -> int:
+        """Drop sessions last seen before ``idle_before`` and trim to ``max_size``.
+
+        Returns the number of sessions removed.
+        """
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class MemorySessionBackend(SessionBackend):
+    """Per-process store kept in least-recently-seen order"""
+
+    def __init__(self, max_size: int):
+        super().__init__(max_size)
+        self.sessions: "OrderedDict[str, Session]" = OrderedDict()
+
+    def add(self, session: Session):
+        self.sessions[session.id] = session
+        # Hard cap between sweeps; the oldest entry is always first
+        if len(self.sessions) > self.max_size:
+            self.sessions.popitem(last=False)
+
+    def get(self, session_id: str) -> Optional[Session]:
+        return self.sessions.get(session_id)
+
+    def touch(self, session_id: str, now: float):
+        session = self.sessions.get(session_id)
+        if session is not None:
+            session.last_seen = now
+            self.sessions.move_to_end(session_id)
+
+    def remove(self, session_id: str):
+        self.sessions.pop(session_id, None)
+
+    def evict(self, idle_before: float) -> int:
+        removed = 0
+        # Entries are ordered by last_seen, so stop at the first live one
+        while self.sessions:
+            oldest = next(iter(self.sessions.values()))
+            if oldest.last_seen >= idle_before and len(self.sessions) <= self.max_size:
+                break
+            self.sessions.popitem(last=False)
+            removed += 1
+        return removed
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+class SQLiteSessionBackend(SessionBackend):
+    """Store shared by every process that opens the same database file.
+
+    Reads go through a short per-process cache and a dedicated connection;
+    in WAL mode they never wait on another process's write lock. Touches
+    are buffered in memory and written in one transaction by ``evict``, so
+    the only statements that can wait on the lock run in a worker thread.
+    """
+
+    blocking_writes = True
+
+    def __init__(self, max_size: int, path: str, cache_ttl: float = 1.0):
+        super().__init__(max_size)
+        self.cache_ttl = cache_ttl
+        # Session and the monotonic time it was read, per recently seen id
+        self.cache: Dict[str, Tuple[Session, float]] = {}
+        # Unwritten last_seen updates
+        self.pending_touches: Dict[str, float] = {}
+        # Autocommit; each statement is its own short transaction. The writer
+        # is shared by worker threads, one at a time.
+        self.writer = sqlite3.connect(
+            path, timeout=5.0, isolation_level=None, check_same_thread=False
+        )
+        self.write_lock = threading.Lock()
+        self.writer.execute("PRAGMA journal_mode=WAL")
+        self.writer.execute("PRAGMA synchronous=NORMAL")
+        self.writer.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "id TEXT PRIMARY KEY, created_at REAL NOT NULL, last_seen REAL NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        self.writer.execute(
+            "CREATE INDEX IF NOT EXISTS sessions_last_seen ON sessions (last_seen)"
+        )
+        # Only used from the event loop, which need not be the creating thread
+        self.reader = sqlite3.connect(
+            path, timeout=0.1, isolation_level=None, check_same_thread=False
+        )
+
+    def add(self, session: Session):
+        with self.write_lock:
+            self.writer.execute(
+                "INSERT OR REPLACE INTO sessions (id, created_at, last_seen) VALUES (?, ?, ?)",
+                (session.id, session.created_at, session.last_seen)
+            )
+            # Hard cap between sweeps
+            self.trim()
+
+    def get(self, session_id: str) -> Optional[Session]:
+        cached = self.cache.get(session_id)
+        if cached is not None and time.monotonic() - cached[1] < self.cache_ttl:
+            return cached[0]
+
+        row = self.reader.execute(
+            "SELECT created_at, last_seen FROM sessions WHERE id = ?", (session_id,)
+        ).fetchone()
+        if row is None:
+            self.cache.pop(session_id, None)
+            return None
+        session = Session(session_id, row[0], max(row[1], self.pending_touches.get(session_id, 0)))
+        self.cache[session_id] = (session, time.monotonic())
+        return session
+
+    def touch(self, session_id: str, now: float):
+        self.pending_touches[session_id] = now
+        cached = self.cache.get(session_id)
+        if cached is not None:
+            cached[0].last_seen = now
+
+    def remove(self, session_id: str):
+        self.cache.pop(session_id, None)
+        self.pending_touches.pop(session_id, None)
+        with self.write_lock:
+            self.writer.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def evict(self, idle_before: float) -> int:
+        # Swapped rather than cleared so touches arriving meanwhile are kept
+        touches, self.pending_touches = self.pending_touches, {}
+        with self.write_lock:
+            self.writer.execute("BEGIN IMMEDIATE")
+            try:
+                self.writer.executemany(
+                    "UPDATE sessions SET last_seen = max(last_seen, ?) WHERE id = ?",
+                    [(now, session_id) for session_id, now in touches.items()]
+                )
+                removed = self.writer.execute(
+                    "DELETE FROM sessions WHERE last_seen < ?", (idle_before,)
+                ).rowcount
+                removed += self.trim()
+                self.writer.execute("COMMIT")
+            except BaseException:
+                self.writer.execute("ROLLBACK")
+                for session_id, now in touches.items():
+                    self.pending_touches.setdefault(session_id, now)
+                raise
+
+        now = time.monotonic()
+        for session_id in [
+            session_id for session_id, (_, read_at) in list(self.cache.items())
+            if now - read_at >= self.cache_ttl
+        ]:
+            self.cache.pop(session_id, None)
+        return removed
+
+    def trim(self) -> int:
+        """Drop the least recently seen sessions beyond ``max_size``"""
+        return self.writer.execute(
+            "DELETE FROM sessions WHERE id IN ("
+            "SELECT id FROM sessions ORDER BY last_seen DESC LIMIT -1 OFFSET ?"
+            ")",
+            (self.max_size,)
+        ).rowcount
+
+    def __len__(self) -> int:
+        return self.reader.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def close(self):
+        self.reader.close()
+        self.writer.close()
+
+def create_session_backend(
+    backend_type: SessionBackendType,
+    max_size: int,
+    path: str
+) -> SessionBackend:
+    if backend_type == SessionBackendType.SQLITE:
+        return SQLiteSessionBackend(max_size, path)
+    return MemorySessionBackend(max_size)
+
+class SessionManager:
+    def __init__(
+        self,
+        backend: Optional[SessionBackend] = None,
+        ttl: float = 3600,
+        touch_interval: float = 1.0,
+        concurrency: int = 16
+    ):
+        self.backend = backend if backend is not None else MemorySessionBackend(10000)
+        self.ttl = ttl
+        # last_seen is only written back once it is this stale
+        self.touch_interval = touch_interval
+        self.concurrency = concurrency
+        self.semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.sweeper: Optional[asyncio.Task] = None
+
+    async def write(self, operation: Callable[..., Any], *args) -> Any:
+        """Run a backend write, in a thread if it may block"""
+        if self.backend.blocking_writes:
+            return await asyncio.to_thread(operation, *args)
+        return operation(*args)
+
+    async def create_session(self) -> str:
+        session_id = str(uuid.uuid4())
+        await self.write(self.backend.add, Session(session_id, time.time()))
+        return session_id
+
+    def validate_session(self, session_id: str) -> bool:
+        session = self.backend.get(session_id)
+        if session is None:
+            return False
+        now = time.time()
+        idle = now - session.last_seen
+        if idle > self.ttl:
+            # Expired but not swept yet
+            return False
+        if idle >= self.touch_interval:
+            self.backend.touch(session_id, now)
+        return True
+
+    async def remove_session(self, session_id: str):
+        await self.write(self.backend.remove, session_id)
+        self.semaphores.pop(session_id, None)
+
+    def session_semaphore(self, session_id: str) -> asyncio.Semaphore:
+        """Semaphore capping concurrent dispatch across a session's requests"""
+        semaphore = self.semaphores.get(session_id)
+        if semaphore is None:
+            semaphore = self.semaphores[session_id] = asyncio.Semaphore(self.concurrency)
+        return semaphore
+
+    async def sweep(self) -> int:
+        """Evict idle and overflow sessions; returns the number removed"""
+        removed = await self.write(self.backend.evict, time.time() - self.ttl)
+        for session_id in [
+            session_id for session_id in self.semaphores
+            if self.backend.get(session_id) is None
+        ]:
+            del self.semaphores[session_id]
+        return removed
+
+    def start_sweeper(self, interval: float):
+        async def sweep_forever():
+            while True:
+                await asyncio.sleep(interval)
+                await self.sweep()
+
+        self.sweeper = asyncio.create_task(sweep_forever())
+
+    async def close(self):
+        if self.sweeper is not None:
+            self.sweeper.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self.sweeper
+            self.sweeper = None
+        self.backend.close()
@@ -0,0 +1,26 @@
+"""Shared fixtures: async tests run on asyncio through anyio's pytest plugin,
+against ``benchmarks/stub_glean.py`` served on a free local port."""
+
+import pytest
+
+from benchmarks.stub_glean import StubGlean, serve
+from src.glean_client import GleanClient
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+def stub():
+    return StubGlean()
+
+@pytest.fixture
+async def stub_url(stub):
+    async with serve(stub) as base_url:
+        yield base_url
+
+@pytest.fixture
+async def client(stub_url):
+    client = GleanClient(None, "token", base_url=stub_url, backoff=0.001)
+    yield client
+    await client.close()
@@ -0,0 +1,116 @@
+import asyncio
+import json
+
+import pytest
+
+from src.events import END, EventBus, OverflowPolicy
+
+def data(frame: bytes):
+    return json.loads(frame.split(b"data: ", 1)[1])
+
+def queued(subscriber):
+    frames = []
+    while not subscriber.queue.empty():
+        frames.append(subscriber.queue.get_nowait())
+    return frames
+
+def test_last_event_id_replays_later_events():
+    bus = EventBus()
+    ids = [bus.publish("s", {"n": n}) for n in range(3)]
+    _, missed, ended = bus.subscribe("s", str(ids[0]))
+    assert [data(frame) for frame in missed] == [{"n": 1}, {"n": 2}]
+    assert not ended
+
+def test_unknown_last_event_id_replays_nothing():
+    bus = EventBus()
+    bus.publish("s", {"n": 0})
+    _, missed, _ = bus.subscribe("s", "999")
+    assert missed == []
+    _, missed, _ = bus.subscribe("s", "not-a-number")
+    assert missed == []
+
+def test_resume_joins_the_stream_of_the_event():
+    bus = EventBus()
+    first = bus.publish("s", {"n": 0}, stream="a")
+    bus.publish("s", {"n": 1}, stream="b")
+    bus.publish("s", {"n": 2}, stream="a")
+    bus.publish("s", {"n": 3}, stream="a", final=True)
+
+    subscriber, missed, ended = bus.subscribe("s", str(first))
+    assert subscriber.stream == "a"
+    assert [data(frame) for frame in missed] == [{"n": 2}, {"n": 3}]
+    assert ended
+    # Already complete, so nothing is left subscribed
+    assert bus.stream_count == 0
+
+def test_named_stream_replays_from_the_start():
+    bus = EventBus()
+    bus.publish("s", {"n": 0}, stream="a")
+    bus.publish("s", {"n": 1})
+    _, missed, _ = bus.subscribe("s", stream="a")
+    assert [data(frame) for frame in missed] == [{"n": 0}]
+
+def test_events_reach_only_their_stream():
+    bus = EventBus()
+    standalone, _, _ = bus.subscribe("s")
+    named, _, _ = bus.subscribe("s", stream="a")
+    bus.publish("s", {"n": 0})
+    bus.publish("s", {"n": 1}, stream="a", final=True)
+    assert [data(frame) for frame in queued(standalone)] == [{"n": 0}]
+    assert queued(named)[-1] is END
+
+def test_replay_buffer_is_bounded():
+    bus = EventBus(replay_size=2)
+    first = bus.publish("s", {"n": 0})
+    for n in range(1, 4):
+        bus.publish("s", {"n": n})
+    # The event is gone from the buffer, so the id can no longer be resumed
+    _, missed, _ = bus.subscribe("s", str(first))
+    assert missed == []
+
+@pytest.mark.parametrize("policy, expected, closed", [
+    (OverflowPolicy.DISCONNECT, [0, 1], True),
+    (OverflowPolicy.DROP_OLDEST, [1, 2], False),
+    (OverflowPolicy.DROP_NEWEST, [0, 1], False),
+])
+def test_overflow_policy(policy, expected, closed):
+    bus = EventBus(queue_size=2, overflow_policy=policy)
+    subscriber, _, _ = bus.subscribe("s")
+    for n in range(3):
+        bus.publish("s", {"n": n})
+    assert subscriber.closed is closed
+    assert [data(frame)["n"] for frame in queued(subscriber)] == expected
+
+def test_disconnected_subscriber_can_resume_what_it_missed():
+    bus = EventBus(queue_size=2, overflow_policy=OverflowPolicy.DISCONNECT)
+    subscriber, _, _ = bus.subscribe("s")
+    ids = [bus.publish("s", {"n": n}) for n in range(4)]
+    delivered = queued(subscriber)
+    last_seen = delivered[-1].split(b"\n", 1)[0].split(b": ")[1].decode()
+    _, missed, _ = bus.subscribe("s", last_seen)
+    assert [data(frame)["n"] for frame in missed] == [2, 3]
+    assert last_seen == str(ids[1])
+
+@pytest.mark.anyio
+async def test_stream_replays_then_follows_live_events():
+    bus = EventBus()
+    first = bus.publish("s", {"n": 0}, stream="a")
+    bus.publish("s", {"n": 1}, stream="a")
+
+    frames = bus.stream("s", str(first))
+    assert data(await frames.__anext__()) == {"n": 1}
+    bus.publish("s", {"n": 2}, stream="a", final=True)
+    assert [data(frame) async for frame in frames] == [{"n": 2}]
+    assert bus.stream_count == 0
+
+@pytest.mark.anyio
+async def test_discarded_session_closes_its_streams():
+    bus = EventBus()
+    frames = bus.stream("s")
+    # The standalone stream has no replay without Last-Event-ID, so open it first
+    first = asyncio.ensure_future(frames.__anext__())
+    await asyncio.sleep(0)
+    bus.publish("s", {"n": 0})
+    assert data(await first) == {"n": 0}
+    bus.discard("s")
+    assert [frame async for frame in frames] == []
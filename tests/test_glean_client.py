@@ -0,0 +1,66 @@
+import asyncio
+
+import httpx
+import pytest
+
+from src.glean_client import MAX_RETRY_AFTER, GleanClient, GleanError
+
+pytestmark = pytest.mark.anyio
+
+async def test_identical_searches_share_one_request(stub, client):
+    stub.latency = 0.05
+    results = await asyncio.gather(*(client.search({"query": "same"}) for _ in range(20)))
+    assert stub.calls["search"] == 1
+    assert all(result is results[0] for result in results)
+
+async def test_searches_are_not_coalesced_across_identities(stub, client):
+    stub.latency = 0.05
+    await asyncio.gather(
+        client.search({"query": "same"}, act_as="alice@example.com"),
+        client.search({"query": "same"}, act_as="bob@example.com"),
+        client.search({"query": "other"}, act_as="alice@example.com"),
+    )
+    assert stub.calls["search"] == 3
+
+async def test_finished_searches_are_not_reused(stub, client):
+    await client.search({"query": "same"})
+    await client.search({"query": "same"})
+    assert stub.calls["search"] == 2
+    assert client.in_flight == {}
+
+async def test_throttled_calls_are_retried(stub, client):
+    stub.fail_every = 2
+    for i in range(10):
+        result = await client.search({"query": f"q{i}"})
+        assert result["results"]
+    # Every other upstream call was a 429 that got retried
+    assert stub.calls["search"] > 10
+
+async def test_retries_give_up_after_max_retries(stub, client):
+    stub.fail_every = 1
+    with pytest.raises(GleanError) as raised:
+        await client.search({"query": "q"})
+    assert raised.value.status == 429
+    assert stub.calls["search"] == client.max_retries + 1
+
+async def test_retry_delay_honours_and_caps_retry_after():
+    client = GleanClient(None, "token", base_url="http://127.0.0.1:9/")
+    try:
+        response = httpx.Response(429, headers={"Retry-After": "2"})
+        assert client.retry_delay(0, response) == 2
+        response = httpx.Response(429, headers={"Retry-After": "3600"})
+        assert client.retry_delay(0, response) == MAX_RETRY_AFTER
+    finally:
+        await client.close()
+
+async def test_retry_delay_backs_off_exponentially_with_jitter():
+    client = GleanClient(None, "token", base_url="http://127.0.0.1:9/", backoff=0.25)
+    try:
+        # A non-numeric Retry-After falls back to the backoff
+        response = httpx.Response(429, headers={"Retry-After": "Wed, 21 Oct 2026 07:28:00 GMT"})
+        for attempt in range(4):
+            delays = [client.retry_delay(attempt, response) for _ in range(200)]
+            assert all(0 <= delay <= 0.25 * 2 ** attempt for delay in delays)
+            assert max(delays) > 0.25 * 2 ** attempt / 2
+    finally:
+        await client.close()
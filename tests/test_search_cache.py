@@ -0,0 +1,114 @@
+import asyncio
+import itertools
+
+import pytest
+from pydantic_core import to_json
+
+from src.glean_client import GleanClient
+from src.search_cache import SearchCache
+
+pytestmark = pytest.mark.anyio
+
+def counting_loader(size: int = 10):
+    """``load`` factory returning distinct values of ``size`` bytes"""
+    counter = itertools.count()
+
+    def loader():
+        async def load():
+            return str(next(counter)).rjust(size, "0")
+        return load
+
+    return loader
+
+async def test_results_are_not_shared_between_identities(stub, stub_url):
+    cache = SearchCache()
+    params = {"query": "payroll", "pageSize": 5}
+    clients = {
+        identity: GleanClient(None, "token", act_as=identity, base_url=stub_url)
+        for identity in ("alice@example.com", "bob@example.com")
+    }
+    try:
+        for _ in range(2):
+            for identity, client in clients.items():
+                async def load(client=client):
+                    return to_json(await client.search(params)).decode()
+                await cache.fetch(params, identity, load)
+    finally:
+        for client in clients.values():
+            await client.close()
+
+    assert stub.calls["search"] == 2
+    assert (cache.misses, cache.hits) == (2, 2)
+    assert {identity for identity, _ in cache.entries} == set(clients)
+
+async def test_equivalent_requests_share_an_entry():
+    cache = SearchCache()
+    loader = counting_loader()
+    first = await cache.fetch({"query": "a  b", "pageSize": 5}, None, loader())
+    second = await cache.fetch({"pageSize": 5, "query": " a b "}, None, loader())
+    assert first == second
+    assert (cache.misses, cache.hits) == (1, 1)
+
+async def test_stale_entries_are_served_while_refreshed():
+    cache = SearchCache(ttl=0, stale_ttl=60)
+    loader = counting_loader()
+    params = {"query": "q"}
+
+    first = await cache.fetch(params, None, loader())
+    stale = await cache.fetch(params, None, loader())
+    assert stale == first
+    assert cache.stale_hits == 1
+    assert len(cache.refreshes) == 1
+
+    await asyncio.gather(*cache.refreshes)
+    refreshed = await cache.fetch(params, None, loader())
+    assert refreshed != first
+
+async def test_one_refresh_at_a_time():
+    cache = SearchCache(ttl=0, stale_ttl=60)
+    loader = counting_loader()
+    await cache.fetch({"query": "q"}, None, loader())
+    for _ in range(5):
+        await cache.fetch({"query": "q"}, None, loader())
+    assert len(cache.refreshes) == 1
+    await asyncio.gather(*cache.refreshes)
+
+async def test_failed_refresh_keeps_the_stale_entry():
+    cache = SearchCache(ttl=0, stale_ttl=60)
+    value = await cache.fetch({"query": "q"}, None, counting_loader()())
+
+    async def failing_load():
+        raise RuntimeError("upstream down")
+
+    assert await cache.fetch({"query": "q"}, None, failing_load) == value
+    await asyncio.gather(*cache.refreshes)
+    assert await cache.fetch({"query": "q"}, None, failing_load) == value
+
+async def test_expired_entries_are_reloaded():
+    cache = SearchCache(ttl=0, stale_ttl=0)
+    loader = counting_loader()
+    first = await cache.fetch({"query": "q"}, None, loader())
+    second = await cache.fetch({"query": "q"}, None, loader())
+    assert first != second
+    assert cache.misses == 2
+
+async def test_least_recently_used_entries_are_evicted_by_size():
+    cache = SearchCache(max_bytes=400)
+    loader = counting_loader(size=90)
+    for i in range(4):
+        await cache.fetch({"query": f"q{i}"}, None, loader())
+    # q0 becomes the most recently used
+    await cache.fetch({"query": "q0"}, None, loader())
+    await cache.fetch({"query": "q4"}, None, loader())
+
+    queries = [key[1] for key in cache.entries]
+    assert cache.total_bytes == 4 * 90
+    assert cache.evictions == 1
+    assert not any('"q1"' in query for query in queries)
+    assert any('"q0"' in query for query in queries)
+
+async def test_oversized_results_are_not_cached():
+    cache = SearchCache(max_bytes=400)
+    await cache.fetch({"query": "big"}, None, counting_loader(size=101)())
+    assert cache.entries == {}
+    assert cache.total_bytes == 0
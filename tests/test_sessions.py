@@ -0,0 +1,122 @@
+import time
+
+import pytest
+
+from src.sessions import MemorySessionBackend, Session, SessionManager, SQLiteSessionBackend
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_backend(request, tmp_path):
+    """Factory for the backend under test; SQLite ones share one database file"""
+    backends = []
+
+    def make(max_size: int = 100):
+        if request.param == "memory":
+            backend = MemorySessionBackend(max_size)
+        else:
+            backend = SQLiteSessionBackend(max_size, str(tmp_path / "sessions.db"), cache_ttl=0)
+        backends.append(backend)
+        return backend
+
+    yield make
+    for backend in backends:
+        backend.close()
+
+def add_idle(backend, session_id: str, idle: float):
+    created_at = time.time() - idle
+    backend.add(Session(session_id, created_at))
+
+async def test_sessions_are_created_and_validated(make_backend):
+    manager = SessionManager(make_backend(), ttl=60)
+    session_id = await manager.create_session()
+    assert manager.validate_session(session_id)
+    assert not manager.validate_session("unknown")
+
+async def test_idle_sessions_expire(make_backend):
+    backend = make_backend()
+    manager = SessionManager(backend, ttl=60)
+    add_idle(backend, "idle", 120)
+    live = await manager.create_session()
+
+    # Expired as soon as the TTL passes, before any sweep
+    assert not manager.validate_session("idle")
+    assert await manager.sweep() == 1
+    assert backend.get("idle") is None
+    assert manager.validate_session(live)
+
+async def test_touched_sessions_stay_alive(make_backend):
+    backend = make_backend()
+    manager = SessionManager(backend, ttl=60, touch_interval=0)
+    add_idle(backend, "busy", 50)
+    assert manager.validate_session("busy")
+
+    manager.ttl = 10
+    assert await manager.sweep() == 0
+    assert manager.validate_session("busy")
+
+async def test_store_is_capped_at_max_size(make_backend):
+    backend = make_backend(max_size=3)
+    manager = SessionManager(backend, ttl=3600)
+    for i in range(5):
+        add_idle(backend, f"s{i}", 100 - i)
+    newest = await manager.create_session()
+
+    await manager.sweep()
+    assert len(backend) == 3
+    # The least recently seen go first
+    assert backend.get("s0") is None and backend.get("s1") is None
+    assert backend.get(newest) is not None
+
+async def test_semaphores_are_dropped_with_their_sessions(make_backend):
+    manager = SessionManager(make_backend(), ttl=60)
+    session_id = await manager.create_session()
+    manager.session_semaphore(session_id)
+    await manager.remove_session(session_id)
+    assert session_id not in manager.semaphores
+    assert not manager.validate_session(session_id)
+
+async def test_sqlite_backends_share_one_file(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    first = SQLiteSessionBackend(3, path, cache_ttl=0)
+    second = SQLiteSessionBackend(3, path, cache_ttl=0)
+    try:
+        workers = [SessionManager(first, ttl=60, touch_interval=0), SessionManager(second, ttl=60, touch_interval=0)]
+        session_id = await workers[0].create_session()
+        assert workers[1].validate_session(session_id)
+
+        # A touch seen by one worker keeps the session alive for the other
+        add_idle(first, "shared", 50)
+        assert workers[1].validate_session("shared")
+        await workers[1].sweep()
+        workers[0].ttl = 10
+        await workers[0].sweep()
+        assert workers[0].validate_session("shared")
+
+        # Removal by one is seen by the other
+        await workers[0].remove_session(session_id)
+        assert not workers[1].validate_session(session_id)
+
+        # The cap applies to the shared store
+        for _ in range(3):
+            await workers[0].create_session()
+            await workers[1].create_session()
+        assert len(first) == len(second) == 3
+    finally:
+        first.close()
+        second.close()
+
+async def test_sqlite_cache_serves_reads_for_cache_ttl(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    first = SQLiteSessionBackend(10, path, cache_ttl=60)
+    second = SQLiteSessionBackend(10, path, cache_ttl=0)
+    try:
+        first.add(Session("s", time.time()))
+        assert first.get("s") is not None
+        second.remove("s")
+        # Still cached by the first backend until its cache_ttl runs out
+        assert first.get("s") is not None
+        assert second.get("s") is None
+    finally:
+        first.close()
+        second.close()
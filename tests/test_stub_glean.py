@@ -0,0 +1,18 @@
+import asyncio
+
+import httpx
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+async def test_concurrent_calls_fail_on_their_own_ordinal(stub, stub_url):
+    # With latency every call is still sleeping when the next one arrives;
+    # each must be judged on its own arrival order, not the final count
+    stub.latency = 0.05
+    stub.fail_every = 5
+    async with httpx.AsyncClient(base_url=stub_url) as http:
+        responses = await asyncio.gather(*(
+            http.post("search", json={"query": f"q{i}"}) for i in range(20)
+        ))
+    assert sorted(response.status_code for response in responses) == [200] * 16 + [429] * 4
+    assert stub.calls["search"] == 20
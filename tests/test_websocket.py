@@ -0,0 +1,47 @@
+import json
+
+import pytest
+import websockets
+
+from benchmarks.stub_glean import serve_app
+from src import server
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+async def mcp_address(stub_url, monkeypatch):
+    monkeypatch.setenv("GLEAN_BASE_URL", stub_url)
+    monkeypatch.setenv("GLEAN_API_TOKEN", "token")
+    await server.reset_client()
+    try:
+        async with serve_app(server.app) as address:
+            yield address
+    finally:
+        await server.reset_client()
+
+def chat_call(request_id: str) -> dict:
+    message = {"author": "USER", "messageType": "CONTENT", "fragments": [{"text": "Holidays?"}]}
+    return {"jsonrpc": "2.0", "id": request_id, "method": "tools/call",
+            "params": {"name": "glean_chat", "arguments": {"messages": [message]}}}
+
+async def test_responses_are_sent_as_they_complete(stub, mcp_address):
+    # The streamed chat takes several chunk delays; the others are immediate
+    stub.chunk_delay = 0.05
+    async with websockets.connect(f"ws://{mcp_address}/v1/mcp/ws") as connection:
+        await connection.send(json.dumps(chat_call("slow")))
+        await connection.send(json.dumps({"jsonrpc": "2.0", "id": "ping", "method": "ping"}))
+        await connection.send(json.dumps({"jsonrpc": "2.0", "id": "tools", "method": "tools/list"}))
+        await connection.send(json.dumps({"jsonrpc": "2.0", "id": 7, "method": "ping"}))
+
+        replies = [json.loads(await connection.recv()) for _ in range(4)]
+
+    assert [reply["id"] for reply in replies][-1] == "slow"
+    assert {reply["id"] for reply in replies[:3]} == {"ping", "tools", 7}
+    assert all(reply.get("error") is None for reply in replies)
+    assert "holidays" in json.dumps(replies[-1]["result"])
+
+async def test_unknown_session_is_refused(mcp_address):
+    headers = {"Mcp-Session-Id": "no-such-session"}
+    with pytest.raises(websockets.InvalidStatusCode):
+        async with websockets.connect(f"ws://{mcp_address}/v1/mcp/ws", extra_headers=headers):
+            pass